@@ -0,0 +1,118 @@
+import math
+import time
+
+import numpy as np
+
+# (name, max distance from the player or None for "anything further", tick interval)
+DEFAULT_TIERS = (
+    ("near", 700, 1),
+    ("mid", 1500, 4),
+    ("far", None, 16),
+)
+
+
+# Level-of-detail NPC updates over a crowd's component arrays (see
+# entities.py). Each tick every NPC's distance to the player picks its tier,
+# and an NPC updates when the tick reaches its slot in the tier's interval,
+# catching up on the ticks in between. Slots are staggered by entity id, so a
+# tier's NPCs are spread evenly over its interval rather than all updating on
+# the same tick.
+#
+# Beyond the near tier, which always updates, the work per tick can be capped:
+# max_updates by count, which is deterministic, and budget_ms by time, checked
+# between blocks of NPCs. Where the cut falls rotates from tick to tick, and
+# whatever is cut stays due until it gets its turn. budget_ms=None turns the
+# time budget off, making updates independent of timing (recorded and
+# replayed sessions need this).
+class AIScheduler:
+    # NPCs updated between looks at the clock under a time budget
+    BLOCK = 1024
+
+    def __init__(self, tiers=DEFAULT_TIERS, budget_ms=2.0, max_updates=None):
+        self.tiers = tiers
+        self.budget_ms = budget_ms
+        self.max_updates = max_updates
+        # Squared limits between tiers; the last tier takes everything further
+        self.limits = []
+        for _, max_distance, _ in tiers[:-1]:
+            if max_distance is None:
+                break
+            self.limits.append(max_distance * max_distance)
+        self.intervals = np.array([interval for _, _, interval in tiers], dtype=np.int32)
+        # Slots repeat with this period, which keeps tick + id small
+        self.period = math.lcm(*self.intervals.tolist())
+        self.stats = {name: 0 for name, _, _ in tiers}
+        self.stats.update(deferred=0, ms=0.0)
+
+    def tier_of(self, distance_sq):
+        # Tier index per NPC, from an array of squared distances to the player
+        tier = np.zeros(distance_sq.shape, dtype=np.int8)
+        for limit in self.limits:
+            tier += distance_sq >= limit
+        return tier
+
+    def update(self, crowd, player, tick):
+        start = time.perf_counter()
+        count = len(crowd)
+        x = crowd.column("x")
+        y = crowd.column("y")
+
+        # Whoever doesn't move this tick must stop interpolating
+        crowd.column("prev_x")[:] = x
+        crowd.column("prev_y")[:] = y
+
+        counts = [0] * len(self.tiers)
+        deferred = 0
+        if count:
+            # Squared in place; temporaries cost more than the arithmetic at this size
+            dx = x - player.x
+            dx *= dx
+            dy = y - player.y
+            dy *= dy
+            dx += dy
+            tier = self.tier_of(dx)
+            interval = self.intervals[tier]
+            last_update = crowd.column("last_update_tick")
+            elapsed = tick - last_update
+            slot = (crowd.ids[:count] + tick % self.period) % interval
+            # Due on its slot, or overdue after being cut or changing tier
+            due = ((slot == 0) | (elapsed > interval)).nonzero()[0]
+            if due.size:
+                updated = self.update_due(crowd, due, tier, elapsed, tick, start)
+                deferred = due.size - updated.size
+                counts = np.bincount(tier[updated], minlength=len(self.tiers)).tolist()
+
+        for (name, _, _), n in zip(self.tiers, counts):
+            self.stats[name] = n
+        self.stats["deferred"] = deferred
+        self.stats["ms"] = (time.perf_counter() - start) * 1000.0
+        return self.stats
+
+    def update_due(self, crowd, due, tier, elapsed, tick, start):
+        # Updates due rows within the caps; returns the rows updated
+        if self.budget_ms is None and self.max_updates is None:
+            blocks = [due]
+        else:
+            near = due[tier[due] == 0]
+            rest = due[tier[due] != 0]
+            if rest.size:
+                # Start somewhere else each tick, so the same NPCs aren't always cut
+                rest = np.roll(rest, -(tick * 7919 % rest.size))
+            if self.max_updates is not None:
+                rest = rest[:self.max_updates]
+            # The near tier goes in with the first block, so small crowds
+            # still update in one call
+            first = self.BLOCK if self.budget_ms is not None else rest.size
+            blocks = [np.concatenate((near, rest[:first]))]
+            blocks += [rest[i:i + self.BLOCK] for i in range(first, rest.size, self.BLOCK)]
+
+        deadline = None if self.budget_ms is None else start + self.budget_ms / 1000.0
+        last_update = crowd.column("last_update_tick")
+        done = []
+        for block in blocks:
+            if done and deadline is not None and time.perf_counter() > deadline:
+                break
+            crowd.update_rows(block, elapsed[block])
+            last_update[block] = tick
+            done.append(block)
+        return done[0] if len(done) == 1 else np.concatenate(done)
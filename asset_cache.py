@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+import shutil
+import struct
+import tempfile
+import time
+
+import pygame
+
+# On-disk cache for startup work that comes out the same on every run: baked
+# surfaces such as sky gradients and character sprites. Surfaces are stored as
+# raw pixels, so loading one is a file read rather than a decode.
+#
+# Baked surfaces go in a subdirectory named by a digest of the pygame version
+# and the source files that draw them, so changing drawing code never brings
+# back stale art. Each run that uses a digest touches its directory, and the
+# first write of a run deletes digest directories nobody has used for
+# PRUNE_AGE, so checkouts in use side by side keep their own art. Failing to
+# write the cache (say, a read-only disk) only means the work is redone next time.
+MAGIC = b"SCAC"
+# magic, width, height, has alpha, anchor x, anchor y
+HEADER = struct.Struct("<4sHHBii")
+# Names of digest directories, and of files earlier versions kept in the root
+DIGEST_NAME = re.compile(r"[0-9a-f]{16}")
+STALE_FILES = ("fonts.json",)
+# Digest directories unused for this long are deleted
+PRUNE_AGE = 30 * 24 * 60 * 60
+
+
+def default_path():
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.environ.get("SHINCHAN_CACHE_DIR") or os.path.join(root, "shinchan-universe")
+
+
+class AssetCache:
+    def __init__(self, path=None, sources=(), enabled=True, prune_age=PRUNE_AGE):
+        # sources: files whose contents the baked surfaces depend on;
+        # prune_age: seconds unused before another digest's directory is deleted
+        self.root = path or default_path()
+        digest = hashlib.sha1(pygame.version.ver.encode("utf-8"))
+        for source in sources:
+            with open(source, "rb") as f:
+                digest.update(f.read())
+        self.path = os.path.join(self.root, digest.hexdigest()[:16])
+        self.enabled = enabled
+        self.prune_age = prune_age
+        self.touched = False
+        self.pruned = False
+        self.hits = 0
+        self.misses = 0
+
+    def surface(self, key, build):
+        # build() returns a Surface; key is any value with a stable repr
+        return self.sprite(key, lambda: (build(), (0, 0)))[0]
+
+    def sprite(self, key, bake):
+        # bake() returns (surface, anchor) as sprite_atlas.bake does
+        if not self.enabled:
+            return bake()
+        if not self.touched:
+            self.touch()
+        file = os.path.join(self.path, hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".bin")
+        try:
+            with open(file, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+        if data is not None and data[:4] == MAGIC:
+            self.hits += 1
+            magic, width, height, alpha, ax, ay = HEADER.unpack_from(data, 0)
+            surface = pygame.image.frombytes(data[HEADER.size:], (width, height), "RGBA" if alpha else "RGB")
+            return surface, (ax, ay)
+
+        self.misses += 1
+        surface, (ax, ay) = bake()
+        alpha = surface.get_flags() & pygame.SRCALPHA != 0
+        width, height = surface.get_size()
+        self.write(file, HEADER.pack(MAGIC, width, height, alpha, ax, ay)
+                   + pygame.image.tobytes(surface, "RGBA" if alpha else "RGB"))
+        return surface, (ax, ay)
+
+    def touch(self):
+        # Marks this digest's directory as in use, so other runs don't prune it
+        self.touched = True
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    def prune(self):
+        # Deletes other digests' directories unused for prune_age, and files
+        # older versions left in the root
+        self.pruned = True
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        current = os.path.basename(self.path)
+        cutoff = time.time() - self.prune_age
+        for name in names:
+            path = os.path.join(self.root, name)
+            if DIGEST_NAME.fullmatch(name) and name != current:
+                try:
+                    stale = os.path.getmtime(path) < cutoff
+                except OSError:
+                    continue
+                if stale:
+                    shutil.rmtree(path, ignore_errors=True)
+            elif name in STALE_FILES:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def write(self, file, data):
+        # Written under a temporary name and renamed into place, so a game
+        # starting at the same time never reads half a file
+        if not self.enabled:
+            return
+        if not self.pruned:
+            self.prune()
+        try:
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=os.path.dirname(file))
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp, file)
+        except OSError:
+            os.unlink(temp)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "path": self.path}
@@ -0,0 +1,50 @@
+import pygame
+
+# Sky palettes as (top color, bottom color)
+PALETTES = {
+    "day": ((173, 173, 255), (255, 255, 255)),
+    "dawn": ((255, 183, 140), (255, 236, 210)),
+    "dusk": ((90, 60, 140), (255, 160, 110)),
+    "night": ((10, 15, 50), (45, 55, 110)),
+}
+
+# (width, height, top, bottom) -> gradient surface
+_gradients = {}
+
+
+# Builds a vertical gradient by filling a 1-pixel-wide strip and stretching it,
+# so only one color is computed per row instead of one draw call per row.
+# assets is an optional AssetCache (see asset_cache) keeping gradients between runs.
+def vertical_gradient(size, top, bottom, assets=None):
+    width, height = size
+    key = (width, height, tuple(top), tuple(bottom))
+    gradient = _gradients.get(key)
+    if gradient is not None:
+        return gradient
+
+    def build():
+        strip = pygame.Surface((1, height))
+        for y in range(height):
+            t = y / height
+            strip.set_at((0, y), tuple(int(a + (b - a) * t) for a, b in zip(top, bottom)))
+        return pygame.transform.scale(strip, (width, height))
+
+    gradient = assets.surface(("gradient",) + key, build) if assets is not None else build()
+    if pygame.display.get_surface() is not None:
+        gradient = gradient.convert()
+
+    _gradients[key] = gradient
+    return gradient
+
+
+def get_backdrop(size, palette="day", assets=None):
+    top, bottom = PALETTES[palette]
+    return vertical_gradient(size, top, bottom, assets)
+
+
+def add_palette(name, top, bottom):
+    PALETTES[name] = (tuple(top), tuple(bottom))
+
+
+def clear_cache():
+    _gradients.clear()
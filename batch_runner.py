@@ -0,0 +1,166 @@
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Keep pygame's import banner out of every worker's output
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import shinchan_engine
+from replay import Replay
+
+# Runs many independent headless games across processes, for automated
+# playtesting and regression runs. Each job is a plain dict so it can be sent
+# to a worker:
+#   seed        seed for the game's random streams
+#   character   character index, 0-3
+#   ticks       simulation ticks to run
+#   controller  "idle", "bot" (random input, see shinchan_engine.RandomController)
+#               or "script" (input replayed from a recording)
+#   script      replay file supplying the input for "script"
+#   world       binary world file, or None for the built-in world
+#   render      also draw every tick to an off-screen surface
+CONTROLLERS = ("idle", "bot", "script")
+
+
+@functools.lru_cache(maxsize=None)
+def load_script(path):
+    # Parsed once per worker, however many of its jobs use the script
+    replay = Replay(path)
+    return replay.moves, replay.keys
+
+
+# Feeds the input of a recording to a game, starting over when it runs out.
+# The recording's character choice is skipped, since the job picks the character.
+class ScriptedController:
+    def __init__(self, path):
+        self.moves, self.keys = load_script(path)
+
+    def __call__(self, game, tick):
+        step = tick % len(self.moves)
+        for key in self.keys[step]:
+            game.handle_key(key)
+        return self.moves[step]
+
+
+def make_jobs(runs, ticks, characters=(0, 1, 2, 3), seed=0, controller="bot", script=None,
+              world=None, render=False):
+    # Consecutive seeds, with characters taken in turn
+    if controller not in CONTROLLERS:
+        raise ValueError(f"unknown controller {controller!r}, expected one of {CONTROLLERS}")
+    if controller == "script" and script is None:
+        raise ValueError("the script controller needs a replay file")
+    return [{"seed": seed + i, "character": characters[i % len(characters)], "ticks": ticks,
+             "controller": controller, "script": script, "world": world, "render": render}
+            for i in range(runs)]
+
+
+def run_job(job):
+    # Runs in a worker process. The AI budget is off so a job's results only
+    # depend on the job.
+    if job["controller"] == "bot":
+        controller = shinchan_engine.RandomController()
+    elif job["controller"] == "script":
+        controller = ScriptedController(job["script"])
+    else:
+        controller = None
+    stats = shinchan_engine.run_headless(job["ticks"], job["character"], controller,
+                                         job["render"], job["world"], seed=job["seed"], fixed_ai=True)
+    stats["controller"] = job["controller"]
+    return stats
+
+
+def summarize(values):
+    if not values:
+        return {"mean": 0, "min": 0, "max": 0}
+    return {"mean": sum(values) / len(values), "min": min(values), "max": max(values)}
+
+
+def make_report(results, seconds, workers):
+    # Aggregate metrics over all runs, plus a breakdown per character
+    ticks = sum(result["ticks"] for result in results)
+    characters = {}
+    for result in results:
+        characters.setdefault(result["character"], []).append(result)
+    return {
+        "runs": len(results),
+        "workers": workers,
+        "seconds": seconds,
+        "ticks": ticks,
+        # Throughput of the whole pool, and the speed of a single game
+        "ticks_per_second": ticks / seconds if seconds > 0 else float("inf"),
+        "run_ticks_per_second": summarize([result["ticks_per_second"] for result in results]),
+        "score": summarize([result["score"] for result in results]),
+        "ability_uses": sum(result["ability_uses"] for result in results),
+        "interactions": sum(result["interactions"] for result in results),
+        "characters": {
+            name: {
+                "runs": len(runs),
+                "score": summarize([result["score"] for result in runs]),
+                "ability_uses": sum(result["ability_uses"] for result in runs),
+                "interactions": sum(result["interactions"] for result in runs),
+            }
+            for name, runs in sorted(characters.items())
+        },
+        "results": sorted(results, key=lambda result: result["seed"]),
+    }
+
+
+def run_batch(jobs, workers=None):
+    # Runs the jobs on a pool of worker processes; returns the report
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(run_job, job) for job in jobs]):
+            results.append(future.result())
+    return make_report(results, time.perf_counter() - start, workers)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run many headless Shin-chan games in parallel")
+    parser.add_argument("--runs", type=int, default=16, help="number of games to run")
+    parser.add_argument("--ticks", type=int, default=10000, help="simulation ticks per game")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--characters", type=int, nargs="+", default=[1, 2, 3, 4],
+                        choices=range(1, 5), help="characters to cycle through (1-4)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game; the rest count up")
+    parser.add_argument("--controller", choices=CONTROLLERS, default="bot", help="input for every game")
+    parser.add_argument("--script", metavar="PATH", help="replay file to take input from with --controller script")
+    parser.add_argument("--world", help="binary world file to play in (see world_format.py)")
+    parser.add_argument("--render", action="store_true",
+                        help="also draw each tick to an off-screen surface")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        jobs = make_jobs(args.runs, args.ticks, [character - 1 for character in args.characters],
+                         args.seed, args.controller, args.script, args.world, args.render)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    report = run_batch(jobs, args.workers)
+
+    print(f"{report['runs']} games, {report['ticks']} ticks in {report['seconds']:.2f}s on "
+          f"{report['workers']} workers ({report['ticks_per_second']:.0f} ticks/s, "
+          f"{report['run_ticks_per_second']['mean']:.0f} per game)")
+    for name, stats in report["characters"].items():
+        score = stats["score"]
+        print(f"  {name:<8} {stats['runs']:4d} runs  score mean {score['mean']:8.1f}"
+              f"  min {score['min']:6d}  max {score['max']:6d}"
+              f"  abilities {stats['ability_uses']:6d}  interactions {stats['interactions']:6d}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+import pygame
+
+import shinchan_engine as game_module
+from shinchan_engine import (Environment, Game, GameState, SCREEN_WIDTH, SCREEN_HEIGHT,
+                             WORLD_WIDTH, WORLD_HEIGHT)
+from world_objects import TREE, WorldObject
+from world_streaming import ObjectListSource
+
+# Preset stress scenes; any parameter left out uses the default in build_scene
+SCENES = {
+    "town": {},
+    "crowd": {"npcs": 300},
+    "forest": {"trees": 1000},
+    "particles": {"particles": 20000, "abilities": True},
+    "abilities": {"npcs": 50, "abilities": True},
+    # Same view as town, but with a crowd and a forest spread over 3x3 screens
+    "world": {"npcs": 2000, "trees": 2000, "spread": True},
+    # Scrolling quickly across the generated world, streaming chunks in and out
+    "stream": {"trees": None, "pan": True},
+    # A hundred thousand NPCs across the whole world, drawing only those in view
+    "horde": {"npcs": 100000, "trees": None, "spread": "world", "draw_offscreen": False},
+}
+
+# Player speed in pan scenes, in pixels per tick
+PAN_SPEED = 20
+
+PHASES = ("update", "draw_game", "environment", "characters")
+
+
+def build_scene(npcs=3, trees=15, particles=0, abilities=False, character=0, seed=0,
+                spread=False, pan=False):
+    # A headless game drawing to an off-screen surface, already in PLAYING state.
+    # Trees and extra NPCs go on the starting screen, or over 3x3 screens if
+    # spread ("world" spreads them over the whole world); trees=None keeps the
+    # generated world instead.
+    random.seed(seed)
+    if spread == "world":
+        width, height = WORLD_WIDTH, WORLD_HEIGHT
+    elif spread:
+        width, height = SCREEN_WIDTH * 3, SCREEN_HEIGHT * 3
+    else:
+        width, height = SCREEN_WIDTH, SCREEN_HEIGHT
+    pygame.font.init()
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    game = Game(surface, headless=True)
+    game.select_character(character)
+
+    if trees is not None:
+        objects = game.environment.create_world()
+        for _ in range(trees):
+            objects.append(WorldObject(TREE, random.randint(50, width - 50), random.randint(50, height - 100),
+                                       40, 60, (0, 100, 0), "Tree"))
+        game.environment.close()
+        game.environment = Environment(source=ObjectListSource(objects))
+    if pan:
+        game.player.speed = PAN_SPEED
+
+    # Extra NPCs cycle through the characters, added one kind at a time
+    extra = npcs - len(game.npcs)
+    if extra > 0:
+        positions = np.array([(random.randint(100, width - 100), random.randint(100, height - 100))
+                              for _ in range(extra)], dtype=np.float64)
+        kinds = (len(game.npcs) + np.arange(extra)) % len(game.characters)
+        for kind, template in enumerate(game.characters):
+            chosen = positions[kinds == kind]
+            if len(chosen) == 0:
+                continue
+            game.npcs.spawn(template["name"], chosen[:, 0], chosen[:, 1], template["color"],
+                            template["speed"], "Hello!", game.tick)
+    for npc in game.npcs[npcs:]:
+        game.remove_npc(npc)
+
+    if particles and not hasattr(game.player, "mischief_particles"):
+        raise ValueError("particle scenes need Shin (character 0)")
+    top_up_particles(game, particles)
+    return game
+
+
+def top_up_particles(game, particles):
+    # Replace particles that died last tick so the live count stays constant
+    if particles:
+        system = game.player.mischief_particles
+        missing = particles - len(system)
+        if missing > 0:
+            life = system.rng.integers(20, 100, missing)
+            system.emit_burst(game.player.x, game.player.y, missing, 1, 3, life)
+
+
+def summarize(samples):
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def run_scene(frames=300, warmup=10, abilities=False, particles=0, seed=0, pan=False,
+              draw_offscreen=True, **params):
+    # draw_offscreen=False leaves NPCs out of view out of the characters phase
+    game = build_scene(abilities=abilities, particles=particles, seed=seed, pan=pan, **params)
+    surface = game.screen
+    timer = time.perf_counter
+    samples = {phase: [] for phase in PHASES}
+    move = (0, 0)
+
+    for frame in range(warmup + frames):
+        if pan:
+            move = (1, 1)
+        elif frame % 30 == 0:
+            move = (random.randint(-1, 1), random.randint(-1, 1))
+        if abilities:
+            # Keep every ability running for the whole scene
+            for character in [game.player] + list(game.npcs):
+                if not character.ability_active:
+                    character.ability_cooldown = 0
+                    character.use_ability()
+                character.ability_timer = game_module.ABILITY_DURATION
+        top_up_particles(game, particles)
+
+        start = timer()
+        game.update(move)
+        after_update = timer()
+        game.draw_game()
+        after_draw = timer()
+        game.environment.draw_3d(surface, *game.render_camera)
+        after_environment = timer()
+        npcs = game.npcs if draw_offscreen else game.visible_npcs(game.render_camera)
+        for character in list(npcs) + [game.player]:
+            character.draw_3d(surface, camera=game.render_camera)
+        after_characters = timer()
+
+        if frame >= warmup:
+            samples["update"].append(after_update - start)
+            samples["draw_game"].append(after_draw - after_update)
+            samples["environment"].append(after_environment - after_draw)
+            samples["characters"].append(after_characters - after_environment)
+
+    assert game.state == GameState.PLAYING
+    game.environment.close()
+    return {phase: summarize(values) for phase, values in samples.items()}
+
+
+def compare(results, baseline, tolerance):
+    # Phases whose p50 is more than `tolerance` slower than the baseline
+    regressions = []
+    for scene, phases in results["scenes"].items():
+        base_scene = baseline.get("scenes", {}).get(scene)
+        if base_scene is None:
+            continue
+        for phase, stats in phases["phases"].items():
+            base = base_scene["phases"].get(phase)
+            if base is None or base["p50_ms"] <= 0:
+                continue
+            ratio = stats["p50_ms"] / base["p50_ms"]
+            if ratio > 1 + tolerance:
+                regressions.append((scene, phase, base["p50_ms"], stats["p50_ms"], ratio))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Shin-chan Universe frame-time benchmarks")
+    parser.add_argument("--scene", action="append", choices=sorted(SCENES),
+                        help="preset scene to run (repeatable; default: all)")
+    parser.add_argument("--npcs", type=int, help="custom scene: number of NPCs")
+    parser.add_argument("--trees", type=int, help="custom scene: number of trees")
+    parser.add_argument("--particles", type=int, help="custom scene: live particles")
+    parser.add_argument("--abilities", action="store_true", help="custom scene: keep abilities active")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scene")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured frames per scene")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results from an earlier --output")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed p50 slowdown against the baseline (0.15 = 15%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    scenes = {}
+    custom = {key: value for key, value in (("npcs", args.npcs), ("trees", args.trees),
+                                             ("particles", args.particles))
+              if value is not None}
+    if custom or args.abilities:
+        scenes["custom"] = dict(custom, abilities=args.abilities)
+    for name in args.scene or ([] if scenes else sorted(SCENES)):
+        scenes[name] = SCENES[name]
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "frames": args.frames,
+        },
+        "scenes": {},
+    }
+    for name, params in scenes.items():
+        phases = run_scene(args.frames, args.warmup, seed=args.seed, **params)
+        results["scenes"][name] = {"params": params, "phases": phases}
+        print(name)
+        for phase, stats in phases.items():
+            print(f"  {phase:<12} mean {stats['mean_ms']:8.3f} ms  p50 {stats['p50_ms']:8.3f}"
+                  f"  p95 {stats['p95_ms']:8.3f}  p99 {stats['p99_ms']:8.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for scene, phase, before, after, ratio in regressions:
+            print(f"REGRESSION {scene}/{phase}: p50 {before:.3f} -> {after:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+# Gameplay capture. The game thread copies each frame's pixels once, straight
+# from the surface's memory into a preallocated slot, and hands the slot to a
+# writer thread that streams it to a raw video file or an ffmpeg pipe. A fixed
+# number of slots bounds memory: when the writer falls behind, new frames are
+# dropped ("drop") or the game waits for a free slot ("block").
+#
+# Raw files hold the frames back to back with no header; convert one with the
+# command from FrameCapture.ffmpeg_input(), e.g.
+#   ffmpeg -f rawvideo -pix_fmt bgr0 -s 1200x800 -r 60 -i game.raw game.mp4
+MODES = ("drop", "block")
+
+# Byte order of 32-bit pixels in memory (little-endian) by the surface's
+# red and blue masks, as ffmpeg pixel formats
+PIXEL_FORMATS = {
+    (0xFF0000, 0xFF): "bgr0",
+    (0xFF, 0xFF0000): "rgb0",
+}
+
+
+class FrameCapture:
+    def __init__(self, path, size, masks, fps=60, mode="drop", slots=8, ffmpeg=None):
+        # size and masks are those of the surfaces that will be captured
+        # (Surface.get_size(), Surface.get_masks()). ffmpeg=True encodes
+        # through an ffmpeg found on the PATH (or give its path); otherwise
+        # raw frames are written to path.
+        if mode not in MODES:
+            raise ValueError(f"unknown capture mode {mode!r}, expected one of {MODES}")
+        pixel_format = PIXEL_FORMATS.get((masks[0], masks[2]))
+        if pixel_format is None:
+            raise ValueError(f"can't capture surfaces with masks {masks}; 32-bit RGB or BGR is needed")
+        self.path = path
+        self.width, self.height = size
+        self.fps = fps
+        self.mode = mode
+        self.pixel_format = pixel_format
+        self.frames = 0
+        self.dropped = 0
+        self.grab_seconds = 0.0  # Time spent in capture() on the game thread
+        self.error = None
+
+        self.free = queue.Queue()
+        for _ in range(slots):
+            self.free.put(np.empty((self.height, self.width * 4), dtype=np.uint8))
+        self.filled = queue.Queue()
+
+        if ffmpeg:
+            executable = shutil.which("ffmpeg") if ffmpeg is True else ffmpeg
+            if executable is None:
+                raise RuntimeError("ffmpeg was not found on the PATH")
+            self.process = subprocess.Popen(
+                [executable, "-loglevel", "error", "-y", *self.ffmpeg_input(), "-i", "-",
+                 "-c:v", "libx264", "-pix_fmt", "yuv420p", path],
+                stdin=subprocess.PIPE)
+            self.output = self.process.stdin
+        else:
+            self.process = None
+            self.output = open(path, "wb")
+        self.thread = threading.Thread(target=self.write_frames, name="frame-capture", daemon=True)
+        self.thread.start()
+
+    def ffmpeg_input(self):
+        # ffmpeg options describing the raw frames
+        return ["-f", "rawvideo", "-pix_fmt", self.pixel_format,
+                "-s", f"{self.width}x{self.height}", "-r", str(self.fps)]
+
+    def capture(self, surface):
+        # Queue the surface's current pixels; returns False if the frame was dropped
+        start = time.perf_counter()
+        if self.error is not None:
+            self.dropped += 1
+            return False
+        try:
+            slot = self.free.get(block=self.mode == "block")
+        except queue.Empty:
+            self.dropped += 1
+            self.grab_seconds += time.perf_counter() - start
+            return False
+        # Rows can be padded past width * 4 bytes, so go through the pitch
+        pixels = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+        rows = pixels.reshape(self.height, surface.get_pitch())
+        np.copyto(slot, rows[:, :self.width * 4])
+        del pixels, rows  # Releases the surface lock the buffer holds
+        self.filled.put(slot)
+        self.frames += 1
+        self.grab_seconds += time.perf_counter() - start
+        return True
+
+    def write_frames(self):
+        # Writer thread. Large writes release the GIL, so the game keeps running.
+        while True:
+            slot = self.filled.get()
+            if slot is None:
+                return
+            if self.error is None:
+                try:
+                    self.output.write(slot.data)
+                except (OSError, ValueError) as e:
+                    self.error = e
+            self.free.put(slot)
+
+    def stats(self):
+        grabbed = self.frames + self.dropped
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "grab_ms": self.grab_seconds * 1000 / grabbed if grabbed else 0.0,
+        }
+
+    def close(self):
+        # Waits for queued frames to be written; raises if writing failed
+        self.filled.put(None)
+        self.thread.join()
+        try:
+            self.output.close()
+        except OSError as e:
+            self.error = self.error or e
+        if self.process is not None:
+            self.process.wait()
+        if self.error is not None:
+            raise RuntimeError(f"capture to {self.path} failed: {self.error}")
+        return self.stats()
+
+
+def capture_surface(path, surface, **kwargs):
+    # A FrameCapture set up for frames of the given surface
+    return FrameCapture(path, surface.get_size(), surface.get_masks(), **kwargs)
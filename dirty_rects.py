@@ -0,0 +1,55 @@
+import pygame
+
+# Tracks the screen regions drawn to since the last present and pushes only
+# those to the display. Regions from the previous frame are included too so
+# whatever moved away from them gets repainted.
+class DirtyRectTracker:
+    def __init__(self, size, full_threshold=0.5, max_rects=64, enabled=True):
+        # enabled=False ignores add(), for screens that are never presented
+        # (headless games), so nothing piles up between presents
+        self.enabled = enabled
+        self.screen_rect = pygame.Rect((0, 0), size)
+        self.full_threshold = full_threshold  # Fraction of the screen area
+        self.max_rects = max_rects
+        self.rects = []
+        self.previous = []
+        self.full = True
+        self.full_updates = 0
+        self.partial_updates = 0
+
+    def add(self, rect):
+        if rect and self.enabled:
+            rect = self.screen_rect.clip(rect)
+            if rect.width and rect.height:
+                self.rects.append(rect)
+
+    def invalidate(self):
+        # Next present pushes the whole screen
+        self.full = True
+
+    def merge(self, rects):
+        # Union overlapping rects until none overlap
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            i = rect.collidelist(merged)
+            while i != -1:
+                rect.union_ip(merged.pop(i))
+                i = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    def present(self):
+        rects = self.merge(self.previous + self.rects)
+        self.previous = self.rects
+        self.rects = []
+
+        area = sum(rect.width * rect.height for rect in rects)
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        if self.full or len(rects) > self.max_rects or area > screen_area * self.full_threshold:
+            self.full = False
+            self.full_updates += 1
+            pygame.display.flip()
+        elif rects:
+            self.partial_updates += 1
+            pygame.display.update(rects)
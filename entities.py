@@ -0,0 +1,267 @@
+import numpy as np
+
+# Structure-of-arrays entity storage. Every component (x, speed, a timer, ...)
+# is one NumPy array with a row per entity, so systems update whole columns
+# at once instead of dispatching a method per object, and an entity costs only
+# its components' bytes. Data shared by many entities (name, color, dialogue)
+# lives once in an archetype table, with each row keeping an index into it.
+#
+# Rows stay packed: removing an entity moves the last row into its place.
+# Entities are also given ids that never change, for anything that has to
+# follow one entity across removals (views, draw order).
+class EntityStore:
+    # (name, dtype) per component; subclasses list their own
+    COMPONENTS = ()
+    # Archetype fields, in the order of the tuples in self.archetypes
+    ARCHETYPE_FIELDS = ()
+    # EntityView subclass of the objects returned by view()
+    view_class = None
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in self.COMPONENTS}
+        self.ids = np.zeros(capacity, np.int32)  # row -> entity id
+        self.rows = np.full(capacity, -1, np.int32)  # entity id -> row, -1 once removed
+        self.next_id = 0
+        self.archetypes = []
+        self.archetype_index = {}
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # Views of every entity, in row order
+        return (self.view_row(row) for row in range(self.count))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.view_row(row) for row in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("entity row out of range")
+        return self.view_row(index)
+
+    def column(self, name):
+        # The live part of a component array; a view, so writes go to the store
+        return self.columns[name][:self.count]
+
+    def archetype(self, *fields):
+        # Index of the archetype with these fields, added if new
+        index = self.archetype_index.get(fields)
+        if index is None:
+            index = len(self.archetypes)
+            self.archetypes.append(fields)
+            self.archetype_index[fields] = index
+        return index
+
+    def reserve(self, count):
+        if count <= self.capacity:
+            return
+        capacity = max(count, self.capacity * 2)
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, column.dtype)
+            grown[:self.count] = column[:self.count]
+            self.columns[name] = grown
+        ids = np.zeros(capacity, np.int32)
+        ids[:self.count] = self.ids[:self.count]
+        self.ids = ids
+        self.capacity = capacity
+
+    def reserve_ids(self):
+        # Room in self.rows for every id handed out so far
+        if self.next_id > len(self.rows):
+            rows = np.full(max(self.next_id, len(self.rows) * 2), -1, np.int32)
+            rows[:len(self.rows)] = self.rows
+            self.rows = rows
+
+    def add_many(self, count, **values):
+        # Appends count entities; values are scalars or arrays per component,
+        # anything left out is zero. Returns the new entity ids.
+        start = self.count
+        self.reserve(start + count)
+        for name, column in self.columns.items():
+            column[start:start + count] = values.get(name, 0)
+        ids = np.arange(self.next_id, self.next_id + count, dtype=np.int32)
+        self.ids[start:start + count] = ids
+        self.next_id += count
+        self.reserve_ids()
+        self.rows[ids] = np.arange(start, start + count)
+        self.count += count
+        return ids
+
+    def add(self, **values):
+        return int(self.add_many(1, **values)[0])
+
+    def add_from(self, other, row):
+        # Copies row of another store of the same class in as a new entity; returns its id
+        values = {name: column[row] for name, column in other.columns.items()}
+        if "archetype" in values:
+            values["archetype"] = self.archetype(*other.archetypes[values["archetype"]])
+        return self.add(**values)
+
+    def remove(self, entity):
+        row = self.row_of(entity)
+        last = self.count - 1
+        if row != last:
+            for column in self.columns.values():
+                column[row] = column[last]
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self.rows[moved] = row
+        self.rows[entity] = -1
+        self.count = last
+
+    def clear(self):
+        self.rows[self.ids[:self.count]] = -1
+        self.count = 0
+
+    def reset(self):
+        # Empty, with ids starting from 0 again and no archetypes, as when
+        # new; views of earlier entities must not be used afterwards
+        self.clear()
+        self.next_id = 0
+        self.archetypes = []
+        self.archetype_index = {}
+
+    def row_of(self, entity):
+        row = self.rows.item(entity) if 0 <= entity < self.next_id else -1
+        if row < 0:
+            raise KeyError(f"entity {entity} is not in the store")
+        return row
+
+    def view(self, entity):
+        return self.view_class.attach(self, entity)
+
+    def view_row(self, row):
+        return self.view_class.attach(self, int(self.ids[row]))
+
+    def view_rows(self, rows):
+        # Views for an array of rows, e.g. from query_radius()
+        attach = self.view_class.attach
+        return [attach(self, entity) for entity in self.ids[rows].tolist()]
+
+    def query_radius(self, x, y, radius):
+        # Rows strictly closer than radius to (x, y)
+        dx = self.column("x") - x
+        dy = self.column("y") - y
+        return np.flatnonzero(dx * dx + dy * dy < radius * radius)
+
+    def query_rect(self, left, top, right, bottom):
+        # Rows whose position lies inside the rectangle
+        xs = self.column("x")
+        ys = self.column("y")
+        return np.flatnonzero((xs >= left) & (xs <= right) & (ys >= top) & (ys <= bottom))
+
+    def query_nearest(self, x, y, k=1, max_radius=None):
+        # Rows of up to k entities closest to (x, y), nearest first; ties go
+        # to the lower row. max_radius leaves out anything that far or further.
+        if k <= 0:
+            return np.zeros(0, np.intp)
+        dx = self.column("x") - x
+        dy = self.column("y") - y
+        distance_sq = dx * dx + dy * dy
+        rows = np.arange(self.count, dtype=np.intp)
+        if max_radius is not None:
+            rows = np.flatnonzero(distance_sq < max_radius * max_radius)
+        if k < rows.size:
+            # Partitioning finds the k nearest without sorting the rest
+            rows = rows[np.argpartition(distance_sq[rows], k - 1)[:k]]
+            kth = distance_sq[rows].max()
+            # Anything tied with the kth distance may have been picked either
+            # way, so decide ties by row
+            closer = rows[distance_sq[rows] < kth]
+            tied = np.flatnonzero(distance_sq == kth)
+            rows = np.concatenate((closer, tied[:k - closer.size]))
+        if rows.size == 0:
+            return rows
+        return rows[np.lexsort((rows, distance_sq[rows]))]
+
+    def get_state(self):
+        # Copies of the live rows, for keyframes
+        return {
+            "columns": {name: self.column(name).copy() for name in self.columns},
+            "ids": self.ids[:self.count].copy(),
+            "next_id": self.next_id,
+            "archetypes": list(self.archetypes),
+        }
+
+    def set_state(self, state):
+        # Entities keep their ids, so views taken before get_state() still work
+        self.reset()
+        for fields in state["archetypes"]:
+            self.archetype(*fields)
+        ids = state["ids"]
+        self.add_many(len(ids), **state["columns"])
+        self.next_id = state["next_id"]
+        self.reserve_ids()
+        self.rows[:] = -1
+        self.ids[:self.count] = ids
+        self.rows[ids] = np.arange(self.count)
+
+
+# Base for objects standing in for one entity. Attribute access on the
+# component names reads and writes the store's arrays, so a view behaves like
+# an ordinary object with those attributes. Views are cheap to make and hold
+# no data of their own; two views of the same entity compare equal. Using a
+# view of a removed entity raises KeyError.
+class EntityView:
+    __slots__ = ("store", "id")
+
+    @classmethod
+    def attach(cls, store, entity):
+        # A view of an existing entity; bypasses __init__, which subclasses
+        # may give a constructor-style signature
+        view = cls.__new__(cls)
+        view.store = store
+        view.id = entity
+        return view
+
+    def __eq__(self, other):
+        return isinstance(other, EntityView) and other.store is self.store and other.id == self.id
+
+    def __hash__(self):
+        return hash((id(self.store), self.id))
+
+    @property
+    def row(self):
+        return self.store.row_of(self.id)
+
+
+def component_property(name):
+    # Property reading and writing one component of a view's entity, as a
+    # Python scalar. Views are read all over the drawing code, so this
+    # inlines row_of() and reads through ndarray.item(), several times faster
+    # than indexing.
+    def get(self):
+        store = self.store
+        row = store.rows.item(self.id)
+        if row < 0:
+            raise KeyError(f"entity {self.id} is not in the store")
+        return store.columns[name].item(row)
+
+    def set(self, value):
+        store = self.store
+        store.columns[name][store.row_of(self.id)] = value
+
+    return property(get, set)
+
+
+def archetype_property(index):
+    # Read-only property for one field of a view's archetype
+    def get(self):
+        store = self.store
+        return store.archetypes[store.columns["archetype"].item(store.row_of(self.id))][index]
+
+    return property(get)
+
+
+def add_component_properties(cls, store_class):
+    # Gives a view class a property per component and archetype field of store_class
+    for name, dtype in store_class.COMPONENTS:
+        if name != "archetype":
+            setattr(cls, name, component_property(name))
+    for index, name in enumerate(store_class.ARCHETYPE_FIELDS):
+        setattr(cls, name, archetype_property(index))
+    return cls
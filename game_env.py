@@ -0,0 +1,206 @@
+import numpy as np
+import pygame
+
+from shinchan_engine import Game, SCREEN_WIDTH, SCREEN_HEIGHT
+from world_format import BinaryChunkSource
+
+# Gym-style environments over Game for training and evaluating agents:
+#   obs, info = env.reset(seed)
+#   obs, reward, terminated, truncated, info = env.step(action)
+#
+# Actions are integers in range(ACTION_COUNT): action % 9 is the move, in the
+# replay encoding (dx + 1) * 3 + (dy + 1), and action // 9 is the button
+# pressed before the move (nothing, the ability, or talking to NPCs nearby).
+# The reward is the score gained.
+#
+# Observations are never copied. Pixels are NumPy views of the memory the
+# game draws into (or of a downscaled buffer), and the state vector is a view
+# of a preallocated array, so every step overwrites the previous observation;
+# copy it to keep it.
+MOVES = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+BUTTONS = (None, pygame.K_SPACE, pygame.K_e)
+ACTION_COUNT = len(MOVES) * len(BUTTONS)
+
+OBSERVATIONS = ("pixels", "state", "both")
+
+# Compact state vector: the player, then every other character as an NPC, in
+# character order. Positions are in world pixels and timers in ticks.
+PLAYER_FIELDS = ("x", "y", "ability_cooldown", "ability_active", "ability_timer", "score")
+NPC_FIELDS = ("x", "y", "talking", "charmed", "dialogue_timer")
+MAX_NPCS = 3
+STATE_SIZE = len(PLAYER_FIELDS) + MAX_NPCS * len(NPC_FIELDS)
+
+
+def pixel_buffer(size, count=None):
+    # RGBX memory for surfaces made with pixel_surface(); a leading count
+    # gives one frame per environment
+    width, height = size
+    shape = (height, width, 4) if count is None else (count, height, width, 4)
+    return np.zeros(shape, dtype=np.uint8)
+
+
+def pixel_surface(buffer):
+    # A Surface drawing straight into buffer, which stays unlocked, unlike
+    # surfarray views that lock the surface while they exist
+    height, width = buffer.shape[:2]
+    return pygame.image.frombuffer(buffer, (width, height), "RGBX")
+
+
+class GameEnv:
+    def __init__(self, character=0, observation="pixels", size=None, frame_skip=1,
+                 max_steps=3000, world=None, seed=None, pixels=None, state=None):
+        # observation: "pixels" (height x width x RGB), "state" (the vector
+        #   above) or "both" (a dict of the two); "state" never draws
+        # size: (width, height) to downscale pixels to, or None for the full screen
+        # frame_skip: simulation ticks per step, repeating the action; only
+        #   the last one is drawn
+        # max_steps: steps before an episode is truncated
+        # world: binary world file, or None for the built-in world
+        # pixels, state: preallocated output arrays to write observations into
+        #   (see VectorGameEnv)
+        if observation not in OBSERVATIONS:
+            raise ValueError(f"unknown observation {observation!r}, expected one of {OBSERVATIONS}")
+        self.character = character
+        self.observation = observation
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.steps = 0
+        self.render = observation != "state"
+        self.size = size or (SCREEN_WIDTH, SCREEN_HEIGHT)
+
+        screen = None
+        self.scaled = None
+        self.pixels = None
+        if self.render:
+            pygame.font.init()
+            if pixels is None:
+                pixels = pixel_buffer(self.size)
+            if size is None:
+                screen = pixel_surface(pixels)
+            else:
+                screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+                self.scaled = pixel_surface(pixels)
+            self.pixels = pixels[..., :3]
+        self.state = np.zeros(STATE_SIZE, dtype=np.float32) if state is None else state
+
+        self.game = Game(screen, headless=True, seed=seed,
+                         world=BinaryChunkSource(world) if world else None)
+        # Deferring NPCs to stay in a time budget would make episodes depend
+        # on machine speed, and dialogue would only be printed
+        self.game.ai_scheduler.budget_ms = None
+        self.game.on_dialogue = None
+
+    def reset(self, seed=None):
+        game = self.game
+        game.restart(seed)
+        game.ai_scheduler.budget_ms = None
+        game.select_character(self.character)
+        self.steps = 0
+        if self.render:
+            game.draw()
+        return self.observe(), self.info()
+
+    def step(self, action):
+        game = self.game
+        move = MOVES[action % 9]
+        button = BUTTONS[action // 9]
+        score = game.player.score
+        if button is not None:
+            game.handle_key(button)
+        for _ in range(self.frame_skip):
+            game.update(move)
+        if self.render:
+            game.draw()
+        self.steps += 1
+        reward = game.player.score - score
+        return self.observe(), reward, False, self.steps >= self.max_steps, self.info()
+
+    def observe(self):
+        if self.observation == "state":
+            return self.state_vector()
+        if self.scaled is not None:
+            pygame.transform.smoothscale(self.game.screen, self.size, self.scaled)
+        if self.observation == "pixels":
+            return self.pixels
+        return {"pixels": self.pixels, "state": self.state_vector()}
+
+    def state_vector(self):
+        # Filled in one assignment from a list; per-element NumPy writes cost more
+        player = self.game.player
+        values = [getattr(player, field) for field in PLAYER_FIELDS]
+        npcs = self.game.npcs[:MAX_NPCS]
+        for npc in npcs:
+            values.extend(getattr(npc, field) for field in NPC_FIELDS)
+        values.extend([0] * ((MAX_NPCS - len(npcs)) * len(NPC_FIELDS)))
+        self.state[:] = values
+        return self.state
+
+    def info(self):
+        game = self.game
+        return {"tick": game.tick, "score": game.player.score,
+                "ability_uses": game.ability_uses, "interactions": game.interactions}
+
+    def close(self):
+        self.game.environment.close()
+
+
+# K environments stepped in lockstep. Their observations share one array per
+# kind, (K, ...) on the first axis, which each environment draws or writes
+# into directly. An environment that finishes an episode is reset right away
+# (its info gets "final_score"), so the batch never has gaps.
+class VectorGameEnv:
+    def __init__(self, count, character=0, observation="pixels", size=None, **kwargs):
+        # character may be one index for all, or a sequence with one per environment
+        characters = character if isinstance(character, (list, tuple)) else [character] * count
+        width, height = size or (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.observation = observation
+        self.count = count
+        self.pixels = None
+        pixels = None
+        if observation != "state":
+            pixels = pixel_buffer((width, height), count)
+            self.pixels = pixels[..., :3]
+        self.states = np.zeros((count, STATE_SIZE), dtype=np.float32)
+        self.envs = [GameEnv(characters[i], observation, size,
+                             pixels=None if pixels is None else pixels[i],
+                             state=self.states[i], **kwargs)
+                     for i in range(count)]
+        self.rewards = np.zeros(count, dtype=np.float32)
+        self.terminated = np.zeros(count, dtype=bool)
+        self.truncated = np.zeros(count, dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def reset(self, seed=None):
+        # Environment i gets seed + i
+        infos = [env.reset(None if seed is None else seed + i)[1] for i, env in enumerate(self.envs)]
+        return self.observe(), infos
+
+    def step(self, actions):
+        # actions: one per environment, any sequence of ints or an int array
+        if isinstance(actions, np.ndarray):
+            actions = actions.tolist()
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            _, reward, terminated, truncated, info = env.step(action)
+            if terminated or truncated:
+                final_score = info["score"]
+                _, info = env.reset()
+                info["final_score"] = final_score
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            infos.append(info)
+        return self.observe(), self.rewards, self.terminated, self.truncated, infos
+
+    def observe(self):
+        if self.observation == "pixels":
+            return self.pixels
+        if self.observation == "state":
+            return self.states
+        return {"pixels": self.pixels, "state": self.states}
+
+    def close(self):
+        for env in self.envs:
+            env.close()
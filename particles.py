@@ -0,0 +1,144 @@
+import math
+import numpy as np
+import pygame
+
+# Struct-of-arrays particle engine. Positions, velocities and lifetimes live
+# in NumPy arrays; live particles are always packed into [0, count) so
+# integration and drawing work on contiguous slices.
+class ParticleSystem:
+    def __init__(self, color, capacity=256, radius_divisor=10, seed=None):
+        self.color = color
+        self.radius_divisor = radius_divisor  # Drawn radius is life // radius_divisor
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.vx = np.zeros(capacity, dtype=np.float64)
+        self.vy = np.zeros(capacity, dtype=np.float64)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.stamps = {}  # radius -> (surface, offset) for batched drawing
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        if capacity <= len(self.life):
+            return
+        capacity = max(capacity, len(self.life) * 2)
+        for name in ("x", "y", "vx", "vy", "life"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def emit(self, x, y, vx, vy, life):
+        # Scalars or arrays; scalars are broadcast to the longest argument
+        x, y, vx, vy, life = np.broadcast_arrays(x, y, vx, vy, life)
+        n = x.size
+        self.reserve(self.count + n)
+        end = self.count + n
+        self.x[self.count:end] = x.ravel()
+        self.y[self.count:end] = y.ravel()
+        self.vx[self.count:end] = vx.ravel()
+        self.vy[self.count:end] = vy.ravel()
+        self.life[self.count:end] = life.ravel()
+        self.count = end
+
+    def emit_burst(self, x, y, count, min_speed, max_speed, life):
+        # Particles flying out from (x, y) in random directions
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        speed = self.rng.uniform(min_speed, max_speed, count)
+        self.emit(x, y, np.cos(angle) * speed, np.sin(angle) * speed, life)
+
+    def update(self, steps=1):
+        n = self.count
+        if n == 0:
+            return
+        self.x[:n] += self.vx[:n] * steps
+        self.y[:n] += self.vy[:n] * steps
+        self.life[:n] -= steps
+        self.compact()
+
+    def compact(self):
+        # Fill dead slots below the new count with live particles from above it
+        n = self.count
+        dead = np.flatnonzero(self.life[:n] <= 0)
+        if dead.size == 0:
+            return
+        new_count = n - dead.size
+        holes = dead[dead < new_count]
+        if holes.size:
+            tail = np.arange(new_count, n)
+            movers = tail[self.life[new_count:n] > 0]
+            for array in (self.x, self.y, self.vx, self.vy, self.life):
+                array[holes] = array[movers]
+        self.count = new_count
+
+    def clear(self):
+        self.count = 0
+
+    def reseed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def get_state(self):
+        # Copy of the live particles and the RNG, for save/restore
+        n = self.count
+        return {"x": self.x[:n].copy(), "y": self.y[:n].copy(), "vx": self.vx[:n].copy(),
+                "vy": self.vy[:n].copy(), "life": self.life[:n].copy(),
+                "rng": self.rng.bit_generator.state}
+
+    def set_state(self, state):
+        self.count = 0
+        self.emit(state["x"], state["y"], state["vx"], state["vy"], state["life"])
+        self.rng.bit_generator.state = state["rng"]
+
+    def get_stamp(self, radius):
+        stamp = self.stamps.get(radius)
+        if stamp is None:
+            # Render the circle exactly as pygame.draw.circle would, then crop.
+            # Colorkeyed RLE stamps blit several times faster than per-pixel alpha.
+            key = (255, 0, 255) if tuple(self.color[:3]) == (0, 0, 0) else (0, 0, 0)
+            size = radius * 2 + 3
+            canvas = pygame.Surface((size, size))
+            canvas.fill(key)
+            pygame.draw.circle(canvas, self.color, (radius + 1, radius + 1), radius)
+            canvas.set_colorkey(key)
+            crop = canvas.get_bounding_rect()
+            surface = canvas.subsurface(crop).copy()
+            surface.set_colorkey(key, pygame.RLEACCEL)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            stamp = (surface, (crop.x - radius - 1, crop.y - radius - 1))
+            self.stamps[radius] = stamp
+        return stamp
+
+    def draw(self, surface, offset_x=0, offset_y=0):
+        # One Surface.blits call for every particle on the surface; returns the Rect covered
+        n = self.count
+        if n == 0:
+            return None
+        radius = self.life[:n] // self.radius_divisor
+        px = self.x[:n].astype(np.int32) + offset_x
+        py = self.y[:n].astype(np.int32) + offset_y
+        width, height = surface.get_size()
+        visible = ((radius > 0) & (px > -radius) & (py > -radius)
+                   & (px < width + radius) & (py < height + radius))
+        if not visible.any():
+            return None
+        radius = radius[visible]
+        px = px[visible]
+        py = py[visible]
+
+        # Look up each particle's stamp and offset through per-radius tables
+        largest = int(radius.max())
+        stamp_table = np.empty(largest + 1, dtype=object)
+        offset_table = np.zeros((largest + 1, 2), dtype=np.int32)
+        for r in np.unique(radius).tolist():
+            stamp_table[r], offset_table[r] = self.get_stamp(r)
+        offsets = offset_table[radius]
+        positions = zip((px + offsets[:, 0]).tolist(), (py + offsets[:, 1]).tolist())
+        surface.blits(zip(stamp_table[radius].tolist(), positions), doreturn=False)
+
+        largest += 1
+        left, top = int(px.min()) - largest, int(py.min()) - largest
+        return pygame.Rect(left, top, int(px.max()) + largest - left, int(py.max()) + largest - top)
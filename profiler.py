@@ -0,0 +1,183 @@
+import csv
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+# Per-phase frame timing with a rolling window of samples. begin()/end()
+# return immediately while disabled, so the hooks can stay in the hot path.
+class FrameProfiler:
+    def __init__(self, history=240):
+        self.enabled = False
+        self.history = history
+        self.frames = deque(maxlen=history)  # One {phase: seconds} dict per frame
+        self.frame_times = deque(maxlen=history)
+        self.current = {}
+        self.starts = {}
+        self.frame_start = None
+        self.panel = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.current = {}
+        self.starts = {}
+        self.frame_start = None
+
+    def begin(self, phase):
+        if not self.enabled:
+            return
+        self.starts[phase] = time.perf_counter()
+
+    def end(self, phase):
+        if not self.enabled:
+            return
+        start = self.starts.pop(phase, None)
+        if start is not None:
+            self.current[phase] = self.current.get(phase, 0.0) + time.perf_counter() - start
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_times.append(now - self.frame_start)
+            self.frames.append(self.current)
+        self.frame_start = now
+        self.current = {}
+
+    def phase_names(self):
+        names = []
+        for frame in self.frames:
+            for name in frame:
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def summary(self):
+        # phase -> mean/p95/max in milliseconds over the window
+        stats = {}
+        columns = {"frame": list(self.frame_times)}
+        for name in self.phase_names():
+            columns[name] = [frame.get(name, 0.0) for frame in self.frames]
+        for name, samples in columns.items():
+            if samples:
+                ms = np.asarray(samples) * 1000.0
+                stats[name] = {"mean": float(ms.mean()), "p95": float(np.percentile(ms, 95)),
+                               "max": float(ms.max())}
+        return stats
+
+    def histogram(self, phase="frame", bins=20):
+        # Counts and bin edges (ms) of the rolling window for one phase
+        if phase == "frame":
+            samples = list(self.frame_times)
+        else:
+            samples = [frame.get(phase, 0.0) for frame in self.frames]
+        return np.histogram(np.asarray(samples) * 1000.0, bins=bins)
+
+    def export_csv(self, path):
+        names = self.phase_names()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "frame_ms"] + [f"{name}_ms" for name in names])
+            for i, (total, frame) in enumerate(zip(self.frame_times, self.frames)):
+                writer.writerow([i, f"{total * 1000:.4f}"]
+                                + [f"{frame.get(name, 0.0) * 1000:.4f}" for name in names])
+        return path
+
+    def draw_overlay(self, surface, text_cache, target_ms=1000 / 60):
+        # Frame-time graph plus a per-phase breakdown in the top-right corner
+        stats = self.summary()
+        names = [name for name in stats if name != "frame"]
+        width, graph_height, line_height = 300, 80, 16
+        height = graph_height + 30 + line_height * (len(names) + 1)
+        x = surface.get_width() - width - 10
+        y = 10
+
+        if self.panel is None or self.panel.get_size() != (width, height):
+            self.panel = pygame.Surface((width, height))
+            self.panel.set_alpha(180)
+            self.panel.fill((0, 0, 0))
+        surface.blit(self.panel, (x, y))
+
+        # Graph, with a reference line at the target frame time
+        scale = graph_height / (target_ms * 2)
+        base = y + 10 + graph_height
+        pygame.draw.line(surface, (255, 80, 80), (x + 10, base - target_ms * scale),
+                         (x + width - 10, base - target_ms * scale))
+        times = list(self.frame_times)
+        if len(times) > 1:
+            step = (width - 20) / (self.history - 1)
+            points = [(x + 10 + i * step, base - min(t * 1000, target_ms * 2) * scale)
+                      for i, t in enumerate(times)]
+            pygame.draw.lines(surface, (120, 255, 120), False, points)
+
+        # Breakdown, rounded so the text cache isn't flooded with unique strings
+        text_y = base + 10
+        for name in ["frame"] + names:
+            if name in stats:
+                values = f"{stats[name]['mean']:.1f} ms   p95 {stats[name]['p95']:.1f} ms"
+                surface.blit(text_cache.render(name, 18, (255, 255, 255)), (x + 10, text_y))
+                surface.blit(text_cache.render(values, 18, (255, 255, 255)), (x + 150, text_y))
+            text_y += line_height
+        return pygame.Rect(x, y, width, height)
+
+
+# Time from process start to the first frame, split into named phases. Each
+# mark() closes the phase running since the previous one.
+class StartupTimer:
+    def __init__(self, start=None):
+        # start: a time.perf_counter() value taken earlier, e.g. before imports
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        lines = [f"  {phase:<14} {seconds * 1000:8.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"  {'total':<14} {self.total() * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+# Share of the main loop's time spent working rather than waiting, kept
+# separately for active frames and idle ones (static screens waiting for input)
+class DutyCycle:
+    MODES = ("active", "idle")
+
+    def __init__(self):
+        self.frames = {mode: 0 for mode in self.MODES}
+        self.seconds = {mode: 0.0 for mode in self.MODES}
+        self.waiting = {mode: 0.0 for mode in self.MODES}
+
+    def add(self, idle, seconds, waited):
+        # One loop iteration of the given length, of which waited was spent asleep
+        mode = "idle" if idle else "active"
+        self.frames[mode] += 1
+        self.seconds[mode] += seconds
+        self.waiting[mode] += waited
+
+    def stats(self):
+        stats = {}
+        for mode in self.MODES + ("total",):
+            modes = self.MODES if mode == "total" else (mode,)
+            seconds = sum(self.seconds[m] for m in modes)
+            busy = seconds - sum(self.waiting[m] for m in modes)
+            stats[mode] = {
+                "frames": sum(self.frames[m] for m in modes),
+                "seconds": seconds,
+                "busy_seconds": busy,
+                "duty_cycle": busy / seconds if seconds > 0 else 0.0,
+            }
+        return stats
+
+    def report(self):
+        return "\n".join(f"  {mode:<7} {stats['frames']:7d} frames in {stats['seconds']:8.1f}s, "
+                         f"busy {stats['duty_cycle']:6.1%}"
+                         for mode, stats in self.stats().items())
@@ -0,0 +1,36 @@
+import random
+
+
+# Independent random.Random streams per subsystem ("ai", "effects", ...), all
+# derived from one seed. A stream's sequence depends only on the seed and its
+# name, so drawing more numbers in one subsystem (say, rendering effects)
+# never shifts another (the simulation).
+class RandomStreams:
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.streams = {}
+
+    def __getitem__(self, name):
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = self.spawn(name)
+            self.streams[name] = stream
+        return stream
+
+    def spawn(self, name):
+        # A stream derived from the seed that isn't tracked in getstate(), for
+        # things outside the simulation such as scripted input
+        return random.Random(f"{self.seed}:{name}")
+
+    def seed_for(self, name, bits=32):
+        # An integer seed for things that keep their own generator (NumPy, world generation)
+        return self[name].getrandbits(bits)
+
+    def getstate(self):
+        return {name: stream.getstate() for name, stream in self.streams.items()}
+
+    def setstate(self, state):
+        for name, stream_state in state.items():
+            self[name].setstate(stream_state)
@@ -0,0 +1,81 @@
+# Depth-sorted draw commands for one frame. Anything drawn in the world
+# submits a command under a stable key with a depth (world y of its base);
+# flush() draws them back to front. Runs of plain blits go out in a single
+# Surface.blits call.
+#
+# The draw order is kept from frame to frame and only re-sorted when a
+# submitted depth breaks it. Since few things move between frames, the sort
+# runs over an almost sorted list, which Python's sort handles in about linear time.
+BLIT = 0
+DRAW = 1
+
+# Ties at the same depth: world objects go behind the characters standing there
+WORLD = 0
+ACTOR = 1
+
+
+class RenderQueue:
+    def __init__(self):
+        self.order = []     # keys in last frame's draw order
+        self.commands = {}  # key -> ((depth, layer), kind, payload) for this frame
+        self.stats = {"commands": 0, "batches": 0, "resorted": False}
+
+    def __len__(self):
+        return len(self.commands)
+
+    def submit_blit(self, key, depth, surface, pos, layer=WORLD):
+        self.commands[key] = ((depth, layer), BLIT, (surface, pos))
+
+    def submit_draw(self, key, depth, draw, layer=ACTOR):
+        # draw(target) paints directly and returns the Rect it touched (or None)
+        self.commands[key] = ((depth, layer), DRAW, draw)
+
+    def flush(self, target):
+        # Draw everything submitted since the last flush; returns the Rects
+        # touched by draw commands (blits of world objects don't change what
+        # the static world under them looks like)
+        commands = self.commands
+        order = [key for key in self.order if key in commands]
+        if len(order) < len(commands):
+            known = set(order)
+            order.extend(key for key in commands if key not in known)
+
+        resorted = False
+        previous = None
+        for key in order:
+            current = commands[key][0]
+            if previous is not None and current < previous:
+                order.sort(key=lambda key: commands[key][0])
+                resorted = True
+                break
+            previous = current
+
+        drawn = []
+        batch = []
+        batches = 0
+        for key in order:
+            sort_key, kind, payload = commands[key]
+            if kind == BLIT:
+                batch.append(payload)
+                continue
+            if batch:
+                target.blits(batch, doreturn=False)
+                batch = []
+                batches += 1
+            rect = payload(target)
+            if rect:
+                drawn.append(rect)
+        if batch:
+            target.blits(batch, doreturn=False)
+            batches += 1
+
+        self.stats["commands"] = len(order)
+        self.stats["batches"] = batches
+        self.stats["resorted"] = resorted
+        self.order = order
+        self.commands = {}
+        return drawn
+
+    def clear(self):
+        self.order = []
+        self.commands = {}
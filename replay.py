@@ -0,0 +1,262 @@
+import io
+import json
+import struct
+import time
+import zlib
+
+import numpy as np
+
+# Replay file, little-endian:
+#   header     MAGIC, version, then the byte lengths of the four sections
+#   metadata   zlib-compressed JSON: game seed, world file, step count, keyframe interval
+#   steps      zlib-compressed input, one record per Game.update call (see encode_step)
+#   keyframes  zlib-compressed JSON of {step: Game.get_state()} (see pack_state)
+#   arrays     zlib-compressed .npz of the NumPy arrays the keyframes refer to
+# A keyframe for step n is the state right before the keys and update of step n.
+# Replays are shared as workloads, so nothing in them is pickled: loading one
+# only ever parses data.
+MAGIC = b"SCRP"
+VERSION = 3
+# The start of every version's header, read before the rest
+PREFIX = struct.Struct("<4sH")
+HEADER = struct.Struct("<4sHIIII")
+
+KEY = struct.Struct("<I")
+MANY_KEYS = 15  # Key count nibble meaning "count follows as a uint16"
+
+
+def encode_step(move, keys):
+    # Low nibble: the move as (dx + 1) * 3 + (dy + 1). High nibble: how many
+    # keys were handled before the update, then each key code as a uint32.
+    # Most steps are a single byte.
+    dx, dy = move
+    if dx not in (-1, 0, 1) or dy not in (-1, 0, 1):
+        raise ValueError(f"moves must be -1, 0 or 1 on each axis to record, got {move}")
+    code = (dx + 1) * 3 + (dy + 1)
+    if len(keys) < MANY_KEYS:
+        data = bytes([code | len(keys) << 4])
+    else:
+        data = bytes([code | MANY_KEYS << 4]) + struct.pack("<H", len(keys))
+    return data + b"".join(KEY.pack(key) for key in keys)
+
+
+def decode_steps(data):
+    moves = []
+    keys = []
+    i = 0
+    while i < len(data):
+        code = data[i]
+        i += 1
+        count = code >> 4
+        if count == MANY_KEYS:
+            count, = struct.unpack_from("<H", data, i)
+            i += 2
+        move = (code & 15) // 3 - 1, (code & 15) % 3 - 1
+        moves.append(move)
+        keys.append(struct.unpack_from(f"<{count}I", data, i))
+        i += count * KEY.size
+    return moves, keys
+
+
+def pack_state(state, arrays):
+    # Game.get_state() as plain JSON data. Arrays are appended to arrays and
+    # replaced by {"array": index}; tuples become {"tuple": [...]}, so they
+    # come back as tuples (random.setstate needs them).
+    if isinstance(state, np.ndarray):
+        arrays.append(state)
+        return {"array": len(arrays) - 1}
+    if isinstance(state, np.generic):
+        return state.item()
+    if isinstance(state, dict):
+        if not all(isinstance(key, str) for key in state):
+            raise TypeError(f"can't store a state with non-string keys: {list(state)}")
+        return {key: pack_state(value, arrays) for key, value in state.items()}
+    if isinstance(state, tuple):
+        return {"tuple": [pack_state(value, arrays) for value in state]}
+    if isinstance(state, list):
+        return [pack_state(value, arrays) for value in state]
+    if state is None or isinstance(state, (bool, int, float, str)):
+        return state
+    raise TypeError(f"can't store {type(state).__name__} in a replay keyframe")
+
+
+def unpack_state(data, arrays):
+    # The reverse of pack_state
+    if isinstance(data, dict):
+        if data.keys() == {"array"}:
+            return arrays[data["array"]]
+        if data.keys() == {"tuple"}:
+            return tuple(unpack_state(value, arrays) for value in data["tuple"])
+        return {key: unpack_state(value, arrays) for key, value in data.items()}
+    if isinstance(data, list):
+        return [unpack_state(value, arrays) for value in data]
+    return data
+
+
+def same_state(a, b):
+    # Exact comparison of two Game.get_state() values
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    if isinstance(a, dict):
+        return (isinstance(b, dict) and a.keys() == b.keys()
+                and all(same_state(a[key], b[key]) for key in a))
+    if isinstance(a, (list, tuple)):
+        return (type(a) is type(b) and len(a) == len(b)
+                and all(same_state(x, y) for x, y in zip(a, b)))
+    return a == b
+
+
+def save_arrays(arrays):
+    buffer = io.BytesIO()
+    np.savez(buffer, *arrays)
+    return buffer.getvalue()
+
+
+def load_arrays(data):
+    # Object arrays would need unpickling, so they are refused
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        return [npz[f"arr_{i}"] for i in range(len(npz.files))]
+
+
+# Records a game's input as it is played. Attaching it turns the AI time
+# budget off, since which NPCs get deferred depends on the machine's speed.
+class InputRecorder:
+    def __init__(self, game, keyframe_interval=600, world=None):
+        # world is the path of the game's world file, if it isn't the built-in world
+        self.game = game
+        self.world = world
+        self.keyframe_interval = keyframe_interval
+        self.steps = bytearray()
+        self.step_count = 0
+        self.pending_keys = []
+        self.keyframes = {}  # step -> packed state
+        self.arrays = []  # Arrays the packed states refer to
+        game.recorder = self
+        game.ai_scheduler.budget_ms = None
+        self.keyframe(0)
+
+    def keyframe(self, step):
+        # get_state() returns copies, so packing keeps them as they are now
+        self.keyframes[step] = pack_state(self.game.get_state(), self.arrays)
+
+    def key(self, key):
+        self.pending_keys.append(key)
+
+    def record_step(self, move):
+        self.steps += encode_step(move, self.pending_keys)
+        self.pending_keys = []
+        self.step_count += 1
+        if self.step_count % self.keyframe_interval == 0:
+            self.keyframe(self.step_count)
+
+    def save(self, path):
+        # The final state is always kept, so a replay can be checked to the end
+        self.keyframe(self.step_count)
+        metadata = {
+            "seed": self.game.random.seed,
+            "world": self.world,
+            "steps": self.step_count,
+            "keyframe_interval": self.keyframe_interval,
+        }
+        sections = [
+            zlib.compress(json.dumps(metadata).encode("utf-8")),
+            zlib.compress(bytes(self.steps), 9),
+            zlib.compress(json.dumps(self.keyframes).encode("utf-8"), 9),
+            zlib.compress(save_arrays(self.arrays), 9),
+        ]
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, *(len(section) for section in sections)))
+            for section in sections:
+                f.write(section)
+        return path
+
+
+class Replay:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version = PREFIX.unpack_from(data, 0) if len(data) >= PREFIX.size else (None, None)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        if version != VERSION:
+            raise ValueError(f"{path} is replay format version {version}, expected {VERSION}")
+        magic, version, *lengths = HEADER.unpack_from(data, 0)
+        sections = []
+        offset = HEADER.size
+        for length in lengths:
+            sections.append(zlib.decompress(data[offset:offset + length]))
+            offset += length
+        self.metadata = json.loads(sections[0])
+        self.moves, self.keys = decode_steps(sections[1])
+        self.keyframes = {int(step): state for step, state in json.loads(sections[2]).items()}
+        self.arrays = load_arrays(sections[3])
+
+    def state(self, step):
+        # The keyframe at step, as Game.get_state() returned it
+        return unpack_state(self.keyframes[step], self.arrays)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def new_game(self, screen=None):
+        # A headless game set up like the recorded one, at step 0
+        import shinchan_engine
+        from world_format import BinaryChunkSource
+
+        world = self.metadata["world"]
+        game = shinchan_engine.Game(screen, headless=True, seed=self.metadata["seed"],
+                                  world=BinaryChunkSource(world) if world else None)
+        game.ai_scheduler.budget_ms = None
+        game.set_state(self.state(0))
+        return game
+
+    def seek(self, game, step):
+        # Jump to the nearest keyframe at or before step, then simulate up to it
+        start = max(frame for frame in self.keyframes if frame <= step)
+        game.set_state(self.state(start))
+        return self.play(game, start, step)
+
+    def play(self, game, start=0, stop=None, verify=True, render=False):
+        # Re-run steps [start, stop) on a game that is at step start. With
+        # verify, the game's state is compared against each keyframe passed;
+        # returns the steps where it differed.
+        stop = len(self) if stop is None else stop
+        mismatches = []
+        for step in range(start, stop):
+            if verify and step != start and step in self.keyframes:
+                if not same_state(game.get_state(), self.state(step)):
+                    mismatches.append(step)
+            for key in self.keys[step]:
+                game.handle_key(key)
+            game.update(self.moves[step])
+            if render:
+                game.draw()
+        if verify and stop != start and stop in self.keyframes:
+            if not same_state(game.get_state(), self.state(stop)):
+                mismatches.append(stop)
+        return mismatches
+
+
+def run_replay(path, render=False, verify=True):
+    # Re-run a whole recording as fast as possible; returns run statistics
+    import pygame
+    import shinchan_engine
+
+    replay = Replay(path)
+    screen = None
+    if render:
+        pygame.font.init()
+        screen = pygame.Surface((shinchan_engine.SCREEN_WIDTH, shinchan_engine.SCREEN_HEIGHT))
+    game = replay.new_game(screen)
+
+    start = time.perf_counter()
+    mismatches = replay.play(game, verify=verify, render=render)
+    seconds = time.perf_counter() - start
+    game.environment.close()
+    return {
+        "steps": len(replay),
+        "seconds": seconds,
+        "steps_per_second": len(replay) / seconds if seconds > 0 else float("inf"),
+        "score": game.player.score if game.player else 0,
+        "mismatches": mismatches,
+    }
@@ -0,0 +1,92 @@
+import pygame
+
+# Packs pre-baked sprites into a few large alpha surfaces (pages) using a
+# simple shelf packer. Each sprite is stored with an anchor offset so it can
+# be blitted relative to the same point the original primitives were drawn at.
+# With an AssetCache, sprites baked in earlier runs are loaded from disk.
+class SpriteAtlas:
+    def __init__(self, page_size=512, padding=1, assets=None):
+        self.page_size = page_size
+        self.padding = padding
+        self.assets = assets
+        self.pages = []
+        self.regions = {}  # key -> (page, area rect, anchor offset)
+        self.cursor_x = 0
+        self.cursor_y = 0
+        self.shelf_height = 0
+        self.bakes = 0
+
+    def new_page(self, width, height):
+        page = pygame.Surface((width, height), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            page = page.convert_alpha()
+        page.fill((0, 0, 0, 0))
+        self.pages.append(page)
+        self.cursor_x = 0
+        self.cursor_y = 0
+        self.shelf_height = 0
+        return page
+
+    def allocate(self, width, height):
+        padded_w = width + self.padding
+        padded_h = height + self.padding
+
+        # Oversized sprites get a page of their own
+        if padded_w > self.page_size or padded_h > self.page_size:
+            page = self.new_page(width, height)
+            # Force the next sprite onto a fresh shared page
+            self.cursor_y = self.page_size
+            return page, pygame.Rect(0, 0, width, height)
+
+        if not self.pages or self.cursor_x + padded_w > self.page_size:
+            self.cursor_x = 0
+            self.cursor_y += self.shelf_height
+            self.shelf_height = 0
+        if not self.pages or self.cursor_y + padded_h > self.page_size:
+            self.new_page(self.page_size, self.page_size)
+
+        rect = pygame.Rect(self.cursor_x, self.cursor_y, width, height)
+        self.cursor_x += padded_w
+        self.shelf_height = max(self.shelf_height, padded_h)
+        return self.pages[-1], rect
+
+    def add(self, key, surface, anchor):
+        page, rect = self.allocate(*surface.get_size())
+        page.blit(surface, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        self.regions[key] = (page, rect, anchor)
+        self.bakes += 1
+        return self.regions[key]
+
+    def get(self, key, bake):
+        # bake() returns (surface, anchor) and is only called on a miss
+        region = self.regions.get(key)
+        if region is None:
+            if self.assets is not None:
+                region = self.add(key, *self.assets.sprite(key, bake))
+            else:
+                region = self.add(key, *bake())
+        return region
+
+    def blit(self, target, key, bake, x, y):
+        page, rect, (ax, ay) = self.get(key, bake)
+        return target.blit(page, (x + ax, y + ay), rect)
+
+    def clear(self):
+        self.pages = []
+        self.regions = {}
+        self.cursor_x = 0
+        self.cursor_y = 0
+        self.shelf_height = 0
+
+
+# Draws with draw_fn(surface, origin_x, origin_y) onto a transparent canvas of
+# the given extent and crops it to the drawn pixels. Returns (surface, anchor)
+# where anchor is the crop's offset from the origin.
+def bake(draw_fn, left, top, right, bottom):
+    canvas = pygame.Surface((right - left, bottom - top), pygame.SRCALPHA)
+    canvas.fill((0, 0, 0, 0))
+    draw_fn(canvas, -left, -top)
+    crop = canvas.get_bounding_rect()
+    if crop.width == 0 or crop.height == 0:
+        crop = pygame.Rect(0, 0, 1, 1)
+    return canvas.subsurface(crop).copy(), (crop.x + left, crop.y + top)
@@ -0,0 +1,73 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from ai_scheduler import AIScheduler
+from shinchan_engine import Crowd
+
+PLAYER = SimpleNamespace(x=0.0, y=0.0)
+
+
+def make_crowd(near=0, mid=0, far=0):
+    # Speed 0 keeps every NPC in its tier however often it moves
+    crowd = Crowd(seed=1)
+    for count, distance in ((near, 100.0), (mid, 1000.0), (far, 5000.0)):
+        crowd.spawn("Kid", np.full(count, distance), 0.0, (255, 0, 0), 0.0, "Hi!")
+    return crowd
+
+
+def test_tiers_update_at_their_interval():
+    crowd = make_crowd(near=3, mid=8, far=32)
+    scheduler = AIScheduler(budget_ms=None)
+    totals = {"near": 0, "mid": 0, "far": 0}
+    for tick in range(1, 65):
+        stats = scheduler.update(crowd, PLAYER, tick)
+        # Slots are staggered, so each tier's work is the same every tick
+        assert (stats["near"], stats["mid"], stats["far"]) == (3, 2, 2)
+        assert stats["deferred"] == 0
+        for name in totals:
+            totals[name] += stats[name]
+    assert totals == {"near": 3 * 64, "mid": 8 * 16, "far": 32 * 4}
+
+
+def test_tier_of():
+    scheduler = AIScheduler()
+    distance = np.array([0, 699, 700, 1499, 1500, 10 ** 6], dtype=np.float64)
+    assert scheduler.tier_of(distance ** 2).tolist() == [0, 0, 1, 1, 2, 2]
+
+
+def test_max_updates_defers_and_catches_up():
+    crowd = make_crowd(near=2, far=40)
+    scheduler = AIScheduler(budget_ms=None, max_updates=5)
+    # Long enough since the last update that everyone is overdue
+    tick = 100
+    stats = scheduler.update(crowd, PLAYER, tick)
+    # The near tier is never cut
+    assert (stats["near"], stats["far"]) == (2, 5)
+    assert stats["deferred"] == 40 - 5
+
+    last_update = crowd.column("last_update_tick")
+    while stats["deferred"]:
+        tick += 1
+        stats = scheduler.update(crowd, PLAYER, tick)
+        assert stats["far"] <= 5
+    # Everyone cut got a turn within a few ticks
+    assert tick <= 100 + 40 // 5
+    assert (last_update[:len(crowd)] > 0).all()
+
+
+def test_catch_up_covers_skipped_ticks():
+    crowd = make_crowd(far=1)
+    scheduler = AIScheduler(budget_ms=None)
+    frame = crowd.column("animation_frame")
+    scheduler.update(crowd, PLAYER, 16)
+    first = frame[0]
+    # One update 16 ticks later animates as far as 16 single-tick updates
+    reference = make_crowd(far=1)
+    reference.update_rows(np.array([0]), 16)
+    assert first == reference.column("animation_frame")[0]
+    assert crowd.column("last_update_tick")[0] == 16
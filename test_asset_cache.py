@@ -0,0 +1,57 @@
+import os
+import time
+
+import pygame
+
+from asset_cache import AssetCache
+
+
+def bake():
+    surface = pygame.Surface((4, 3))
+    surface.fill((10, 20, 30))
+    return surface, (1, -2)
+
+
+def test_round_trip(tmp_path):
+    cache = AssetCache(tmp_path)
+    cache.sprite("sky", bake)
+    surface, anchor = AssetCache(tmp_path).sprite("sky", lambda: 1 / 0)
+    assert anchor == (1, -2)
+    assert surface.get_size() == (4, 3)
+    assert surface.get_at((0, 0))[:3] == (10, 20, 30)
+
+
+def test_disabled_writes_nothing(tmp_path):
+    cache = AssetCache(tmp_path, enabled=False)
+    assert cache.sprite("sky", bake)[1] == (1, -2)
+    assert os.listdir(tmp_path) == []
+
+
+def test_prunes_only_unused_digests(tmp_path):
+    old = tmp_path / "0123456789abcdef"
+    recent = tmp_path / "fedcba9876543210"
+    other = tmp_path / "notes"
+    for path in (old, recent, other):
+        path.mkdir()
+    long_ago = time.time() - 60 * 24 * 60 * 60
+    os.utime(old, (long_ago, long_ago))
+    os.utime(other, (long_ago, long_ago))
+    (tmp_path / "fonts.json").write_text("{}")
+
+    cache = AssetCache(tmp_path)
+    cache.sprite("sky", bake)
+    # Another checkout's art in use stays; only the long unused digest goes
+    assert sorted(os.listdir(tmp_path)) == sorted([recent.name, other.name,
+                                                  os.path.basename(cache.path)])
+
+
+def test_use_keeps_a_digest_from_being_pruned(tmp_path):
+    first = AssetCache(tmp_path, sources=[__file__])
+    first.sprite("sky", bake)
+    long_ago = time.time() - 60 * 24 * 60 * 60
+    os.utime(first.path, (long_ago, long_ago))
+    # Reading from the cache again marks it used
+    AssetCache(tmp_path, sources=[__file__]).sprite("sky", bake)
+
+    AssetCache(tmp_path).sprite("sky", bake)
+    assert os.path.isdir(first.path)
@@ -0,0 +1,17 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import benchmark
+
+
+def test_scenes_keep_no_dirty_rects(monkeypatch):
+    games = []
+    build_scene = benchmark.build_scene
+    monkeypatch.setattr(benchmark, "build_scene",
+                        lambda **params: games.append(build_scene(**params)) or games[-1])
+    results = benchmark.run_scene(frames=20, warmup=2, npcs=60, abilities=True)
+    # draw_game is timed on its own, so nothing presents what it draws
+    assert games[0].dirty_rects.rects == []
+    assert set(results) == set(benchmark.PHASES)
+    assert results["draw_game"]["p50_ms"] > 0
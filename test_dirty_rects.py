@@ -0,0 +1,60 @@
+import pygame
+import pytest
+
+from dirty_rects import DirtyRectTracker
+
+
+@pytest.fixture
+def presented(monkeypatch):
+    # Records what present() pushes instead of touching a display
+    calls = []
+    monkeypatch.setattr(pygame.display, "flip", lambda: calls.append("flip"))
+    monkeypatch.setattr(pygame.display, "update", lambda rects: calls.append(sorted(map(tuple, rects))))
+    return calls
+
+
+def test_merge_unions_overlapping_rects():
+    tracker = DirtyRectTracker((100, 100))
+    # The third rect joins the first two into one
+    merged = tracker.merge([pygame.Rect(0, 0, 10, 10), pygame.Rect(20, 0, 10, 10),
+                            pygame.Rect(5, 5, 20, 2), pygame.Rect(50, 50, 5, 5)])
+    assert sorted(map(tuple, merged)) == [(0, 0, 30, 10), (50, 50, 5, 5)]
+
+
+def test_add_clips_to_screen():
+    tracker = DirtyRectTracker((100, 100))
+    tracker.add(pygame.Rect(-10, 90, 20, 20))
+    tracker.add(pygame.Rect(200, 200, 10, 10))
+    tracker.add(None)
+    assert tracker.rects == [pygame.Rect(0, 90, 10, 10)]
+
+
+def test_partial_update_includes_previous_frame(presented):
+    tracker = DirtyRectTracker((100, 100))
+    tracker.present()  # The first present is always full
+    tracker.add(pygame.Rect(0, 0, 10, 10))
+    tracker.present()
+    tracker.add(pygame.Rect(50, 50, 10, 10))
+    tracker.present()
+    tracker.present()
+    assert presented == ["flip", [(0, 0, 10, 10)], [(0, 0, 10, 10), (50, 50, 10, 10)],
+                         [(50, 50, 10, 10)]]
+    assert tracker.partial_updates == 3
+
+
+def test_falls_back_to_flip(presented):
+    tracker = DirtyRectTracker((100, 100), full_threshold=0.5, max_rects=3)
+    tracker.present()
+    # Over half the screen
+    tracker.add(pygame.Rect(0, 0, 100, 60))
+    tracker.present()
+    tracker.present()  # Still over half, from the previous frame
+    # Too many separate rects
+    for i in range(4):
+        tracker.add(pygame.Rect(i * 20, 0, 5, 5))
+    tracker.present()
+    tracker.present()
+    tracker.invalidate()
+    tracker.present()
+    assert presented == ["flip", "flip", "flip", "flip", "flip", "flip"]
+    assert tracker.full_updates == 6
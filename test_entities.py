@@ -0,0 +1,92 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pytest
+
+from shinchan_engine import NPC, Crowd
+
+
+def make_crowd(positions):
+    crowd = Crowd()
+    for x, y in positions:
+        crowd.spawn("Kid", x, y, (255, 0, 0), 2.0, "Hi!")
+    return crowd
+
+
+def test_add_and_remove_keep_ids():
+    crowd = make_crowd([(0, 0), (10, 0), (20, 0), (30, 0)])
+    first, second = crowd.view(0), crowd.view(3)
+    crowd.remove(1)
+    # The last row moves into the gap, but ids and views still find their entity
+    assert len(crowd) == 3
+    assert crowd.row_of(3) == 1
+    assert second.x == 30
+    assert first.x == 0
+    assert crowd.ids[:len(crowd)].tolist() == [0, 3, 2]
+    with pytest.raises(KeyError):
+        crowd.row_of(1)
+    with pytest.raises(KeyError):
+        crowd.view(1).x
+    # Ids are never reused
+    assert crowd.add(x=40.0) == 4
+
+
+def test_views_write_through():
+    crowd = make_crowd([(0, 0)])
+    npc = crowd.view(0)
+    npc.x = 5
+    assert crowd.column("x")[0] == 5
+    assert npc.name == "Kid"
+    assert isinstance(npc, NPC)
+    assert npc == crowd[0]
+    assert len({npc, crowd[0]}) == 1
+
+
+def test_set_state_keeps_ids():
+    crowd = make_crowd([(0, 0), (10, 0), (20, 0)])
+    crowd.remove(0)
+    state = crowd.get_state()
+    view = crowd.view(2)
+    crowd.remove(2)
+    crowd.spawn("Dog", 50, 50, (0, 0, 255), 1.0, "Woof")
+
+    crowd.set_state(state)
+    assert len(crowd) == 2
+    assert view.x == 20
+    assert view.name == "Kid"
+    with pytest.raises(KeyError):
+        crowd.row_of(3)
+    # New entities continue from the saved next id
+    assert crowd.add() == 3
+
+
+def test_query_radius():
+    crowd = make_crowd([(0, 0), (3, 4), (5, 5), (-100, 0)])
+    # Strictly closer than the radius, so (3, 4) at exactly 5 is left out
+    assert crowd.query_radius(0, 0, 5).tolist() == [0]
+    assert sorted(crowd.query_radius(0, 0, 8).tolist()) == [0, 1, 2]
+    assert crowd.query_radius(1000, 1000, 10).size == 0
+
+
+def test_query_nearest():
+    rng = np.random.default_rng(1)
+    points = rng.integers(-20, 20, size=(300, 2))
+    crowd = make_crowd(points.tolist())
+    distance_sq = ((points - (3, -2)) ** 2).sum(axis=1)
+    expected = np.lexsort((np.arange(len(points)), distance_sq))
+    for k in (1, 5, 37, 300, 500):
+        assert crowd.query_nearest(3, -2, k).tolist() == expected[:k].tolist()
+    within = crowd.query_nearest(3, -2, 500, max_radius=6)
+    assert within.tolist() == expected[:np.count_nonzero(distance_sq < 36)].tolist()
+    assert crowd.query_nearest(3, -2, 0).size == 0
+
+
+def test_spawn_many_and_none():
+    crowd = Crowd()
+    ids = crowd.spawn("Kid", np.arange(5.0), 0.0, (255, 0, 0), 2.0, "Hi!")
+    assert ids.tolist() == [0, 1, 2, 3, 4]
+    assert crowd.column("y").tolist() == [0.0] * 5
+    assert crowd.spawn("Kid", np.zeros(0), np.zeros(0), (255, 0, 0), 2.0, "Hi!").size == 0
+    assert len(crowd) == 5
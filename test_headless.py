@@ -0,0 +1,54 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from replay import Replay
+from shinchan_engine import SCREEN_HEIGHT, SCREEN_WIDTH, Game, RandomController, main, run_headless
+
+
+def test_headless_drawing_keeps_no_dirty_rects():
+    pygame.font.init()
+    game = Game(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)), headless=True, seed=1)
+    game.on_dialogue = None
+    game.select_character(0)
+    try:
+        for _ in range(50):
+            game.update((1, 0))
+            game.draw()
+            assert game.dirty_rects.rects == []
+    finally:
+        game.environment.close()
+
+
+def test_run_headless_is_deterministic():
+    first = run_headless(300, 1, seed=5, fixed_ai=True)
+    second = run_headless(300, 1, seed=5, fixed_ai=True)
+    assert first["character"] == "Misae"
+    assert {k: v for k, v in first.items() if k not in ("seconds", "ticks_per_second")} == \
+        {k: v for k, v in second.items() if k not in ("seconds", "ticks_per_second")}
+
+
+def test_bot_runs_repeat_with_a_fresh_controller():
+    first = run_headless(600, 0, RandomController(), seed=2, fixed_ai=True)
+    second = run_headless(600, 0, RandomController(), seed=2, fixed_ai=True)
+    assert first["score"] == second["score"]
+    assert first["ability_uses"] == second["ability_uses"] > 0
+
+
+def test_cli_seed_matches_run_headless(tmp_path, capsys):
+    path = tmp_path / "bot.rep"
+    main(["--headless", "--bot", "--ticks", "400", "--seed", "5", "--record", str(path)])
+    output = capsys.readouterr().out
+    stats = run_headless(400, 0, RandomController(), seed=5)
+    assert Replay(path).metadata["seed"] == 5
+    assert output.rstrip().endswith(f"score {stats['score']}")
+
+
+def test_dialogue_is_dropped_unless_asked_for(capsys):
+    lines = []
+    quiet = run_headless(600, 3, RandomController(), seed=2, fixed_ai=True)
+    assert capsys.readouterr().out == ""
+    stats = run_headless(600, 3, RandomController(), seed=2, fixed_ai=True, on_dialogue=lines.append)
+    assert stats["interactions"] == quiet["interactions"] == len(lines) > 0
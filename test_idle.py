@@ -0,0 +1,62 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from shinchan_engine import SCREEN_HEIGHT, SCREEN_WIDTH, Game, GameState, init_display
+
+
+@pytest.fixture
+def game():
+    pygame.font.init()
+    game = Game(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)), headless=True, seed=1)
+    game.on_dialogue = None
+    game.select_character(0)
+    yield game
+    game.environment.close()
+
+
+def test_pause_screen_composes_the_world_once(game, monkeypatch):
+    for _ in range(3):
+        game.update((1, 0))
+    game.handle_key(pygame.K_p)
+    assert game.is_idle()
+
+    calls = []
+    draw_game = game.draw_game
+    monkeypatch.setattr(game, "draw_game", lambda *args: calls.append(args) or draw_game(*args))
+    for _ in range(5):
+        game.draw()
+    assert len(calls) == 1
+
+    # Paused again later, the frame shows the game as it is then
+    game.handle_key(pygame.K_p)
+    game.update((1, 0))
+    game.draw()
+    game.handle_key(pygame.K_p)
+    game.draw()
+    game.draw()
+    assert len(calls) == 3
+    assert game.state == GameState.PAUSED
+
+
+def test_only_input_and_exposure_ask_for_a_redraw(game):
+    init_display()
+    try:
+        game.draw()
+        assert not game.redraw
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(5, 5), rel=(1, 1), buttons=(0, 0, 0)))
+        pygame.event.post(pygame.event.Event(pygame.ACTIVEEVENT, gain=1, state=1))
+        assert game.handle_events()
+        assert not game.redraw
+        pygame.event.post(pygame.event.Event(pygame.WINDOWEXPOSED))
+        game.handle_events()
+        assert game.redraw
+        game.draw()
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_p))
+        game.handle_events()
+        assert game.redraw
+    finally:
+        pygame.display.quit()
@@ -0,0 +1,57 @@
+import numpy as np
+
+from particles import ParticleSystem
+
+
+def live(system):
+    n = len(system)
+    return sorted(zip(system.x[:n].tolist(), system.life[:n].tolist()))
+
+
+def test_compact_keeps_live_particles_packed():
+    system = ParticleSystem((255, 0, 0), capacity=4)
+    # Ids in x; dead ones are spread through the array, including the tail
+    life = [3, 1, 5, 1, 2, 1, 4, 1]
+    system.emit(np.arange(8.0), 0.0, 0.0, 0.0, life)
+    system.update()
+    assert len(system) == 4
+    assert live(system) == [(0.0, 2), (2.0, 4), (4.0, 1), (6.0, 3)]
+    # The rest stay consistent across every array
+    system.vx[:4] = system.x[:4]
+    system.update()
+    assert live(system) == [(0.0, 1), (4.0, 3), (12.0, 2)]
+
+
+def test_compact_when_all_die():
+    system = ParticleSystem((255, 0, 0))
+    system.emit(0.0, 0.0, 1.0, 1.0, [1, 1, 1])
+    system.update()
+    assert len(system) == 0
+    system.update()
+    assert len(system) == 0
+
+
+def test_emit_grows_capacity():
+    system = ParticleSystem((255, 0, 0), capacity=2)
+    system.emit(1.0, 2.0, 0.0, 0.0, 10)
+    system.emit_burst(5.0, 5.0, 9, 1.0, 2.0, 20)
+    assert len(system) == 10
+    assert system.x[0] == 1.0 and system.y[0] == 2.0
+    speed = np.hypot(system.vx[1:10], system.vy[1:10])
+    assert ((speed >= 1.0) & (speed <= 2.0)).all()
+
+
+def test_state_round_trip():
+    system = ParticleSystem((255, 0, 0), seed=3)
+    system.emit_burst(0.0, 0.0, 5, 1.0, 2.0, 30)
+    state = system.get_state()
+    system.update(10)
+    system.emit_burst(0.0, 0.0, 5, 1.0, 2.0, 30)
+    system.set_state(state)
+    assert len(system) == 5
+    assert system.life[:5].tolist() == [30] * 5
+    other = ParticleSystem((255, 0, 0), seed=3)
+    other.emit_burst(0.0, 0.0, 5, 1.0, 2.0, 30)
+    other.emit_burst(0.0, 0.0, 5, 1.0, 2.0, 30)
+    system.emit_burst(0.0, 0.0, 5, 1.0, 2.0, 30)
+    assert np.array_equal(system.vx[:10], other.vx[:10])
@@ -0,0 +1,117 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from render_queue import ACTOR, WORLD, RenderQueue
+from shinchan_engine import Environment
+from world_objects import HOUSE, TREE, WorldObject
+from world_streaming import ObjectListSource
+
+
+# Records what a flush draws, in order
+class Target:
+    def __init__(self):
+        self.drawn = []
+        self.batches = 0
+
+    def blits(self, batch, doreturn=True):
+        self.batches += 1
+        self.drawn.extend(surface for surface, pos in batch)
+
+
+def submit_actor(queue, key, depth):
+    def draw(target):
+        target.drawn.append(key)
+        return pygame.Rect(0, 0, 1, 1)
+    queue.submit_draw(key, depth, draw)
+
+
+def test_draws_back_to_front():
+    queue = RenderQueue()
+    target = Target()
+    submit_actor(queue, "b", 20)
+    queue.submit_blit("house", 15, "house", (0, 0))
+    submit_actor(queue, "a", 10)
+    assert len(queue.flush(target)) == 2
+    assert target.drawn == ["a", "house", "b"]
+    assert queue.stats["resorted"]
+
+
+def test_resorts_only_when_order_breaks():
+    queue = RenderQueue()
+    for depths in ({"a": 1, "b": 2}, {"a": 1.5, "b": 2}, {"a": 3, "b": 2}):
+        target = Target()
+        for key, depth in depths.items():
+            submit_actor(queue, key, depth)
+        queue.flush(target)
+        drawn = target.drawn
+    # The last frame swapped them, which needed a sort
+    assert drawn == ["b", "a"]
+    assert queue.stats["resorted"]
+    # Same depths again: last frame's order still holds
+    submit_actor(queue, "b", 2)
+    submit_actor(queue, "a", 3)
+    queue.flush(Target())
+    assert not queue.stats["resorted"]
+
+
+def test_world_objects_draw_behind_actors_at_the_same_depth():
+    queue = RenderQueue()
+    target = Target()
+    submit_actor(queue, "actor", 10)
+    queue.submit_blit("tree", 10, "tree", (0, 0), WORLD)
+    queue.submit_draw("other", 10, lambda target: target.drawn.append("other"), ACTOR)
+    queue.flush(target)
+    # World first, then actors in the order they were submitted
+    assert target.drawn == ["tree", "actor", "other"]
+
+
+def test_batches_consecutive_blits():
+    queue = RenderQueue()
+    target = Target()
+    for depth in range(3):
+        queue.submit_blit(depth, depth, depth, (0, 0))
+    submit_actor(queue, "actor", 5)
+    queue.submit_blit("front", 6, "front", (0, 0))
+    queue.flush(target)
+    assert target.drawn == [0, 1, 2, "actor", "front"]
+    assert target.batches == queue.stats["batches"] == 2
+
+
+def test_occluders_hide_characters_walking_behind():
+    pygame.font.init()
+    house = WorldObject(HOUSE, 200, 300, 150, 120, (139, 69, 19), "House")
+    # In front of the house and overlapping it, but clear of the character
+    tree = WorldObject(TREE, 330, 400, 40, 60, (0, 100, 0), "Tree")
+    far_tree = WorldObject(TREE, 2000, 300, 40, 60, (0, 100, 0), "Tree")
+    env = Environment(source=ObjectListSource([house, tree, far_tree]), threaded=False)
+    try:
+        # A character standing behind the house's base, overlapping it
+        behind = pygame.Rect(220, 330, 40, 60)
+        occluders = env.occluders_for([behind])
+        # The house, and the tree in front of it so re-drawing the house doesn't cover the tree
+        assert sorted(depth for depth, _, _, _ in occluders) == [420, 460]
+
+        queue = RenderQueue()
+        target = Target()
+        submit_actor(queue, "character", behind.bottom)
+        env.submit_occluders(queue, [behind])
+        queue.flush(target)
+        assert target.drawn[0] == "character"
+        assert len(target.drawn) == 3
+
+        # Walking out in front of the house, it draws over the house instead
+        in_front = pygame.Rect(220, 410, 40, 60)
+        submit_actor(queue, "character", in_front.bottom)
+        env.submit_occluders(queue, [in_front])
+        target = Target()
+        queue.flush(target)
+        assert target.drawn[-1] == "character"
+        assert len(target.drawn) == 3
+
+        # Nowhere near anything standing
+        assert env.occluders_for([pygame.Rect(1200, 1200, 40, 60)]) == []
+    finally:
+        env.close()
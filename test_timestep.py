@@ -0,0 +1,31 @@
+import pytest
+
+from timestep import FixedTimestep
+
+
+def test_accumulates_partial_ticks():
+    timestep = FixedTimestep(10)
+    assert timestep.advance(0.05) == 0
+    assert timestep.alpha() == pytest.approx(0.5)
+    assert timestep.advance(0.17) == 2
+    assert timestep.alpha() == pytest.approx(0.2)
+    assert timestep.ticks == 2
+
+
+def test_drops_ticks_beyond_max_steps():
+    timestep = FixedTimestep(10, max_steps=3)
+    # A one second stall would need 10 ticks; only 3 run and the rest are dropped
+    assert timestep.advance(1.05) == 3
+    assert timestep.dropped_ticks == 7
+    # Nothing is carried over, so the next frame doesn't fall behind again
+    assert timestep.alpha() == 0.0
+    assert timestep.advance(0.1) == 1
+    assert timestep.ticks == 4
+    assert timestep.dropped_ticks == 7
+
+
+def test_reset():
+    timestep = FixedTimestep(10)
+    timestep.advance(0.09)
+    timestep.reset()
+    assert timestep.advance(0.05) == 0
@@ -0,0 +1,37 @@
+import pytest
+
+from world_format import BinaryChunkSource, WorldFile, save_world
+from world_objects import HOUSE, TREE, WorldObject
+from world_streaming import CHUNK_SIZE
+
+
+def test_round_trip(tmp_path):
+    objects = [
+        WorldObject(HOUSE, 10, 20, 100, 80, (200, 50, 50), "Nohara House"),
+        WorldObject(TREE, CHUNK_SIZE + 5, 7, 40, 60, (20, 120, 20), "tree"),
+        WorldObject(TREE, -30, -CHUNK_SIZE - 1, 40, 60, (20, 120, 20), "tree"),
+    ]
+    path = tmp_path / "test.world"
+    assert save_world(path, objects) == 3
+
+    source = BinaryChunkSource(path)
+    try:
+        assert len(source.world) == 3
+        for obj, chunk in zip(objects, [(0, 0), (1, 0), (-1, -2)]):
+            loaded = source.load_chunk(chunk)
+            assert [o.to_dict() for o in loaded] == [obj.to_dict()]
+        assert source.load_chunk((5, 5)) == []
+    finally:
+        source.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "bad.world"
+    path.write_bytes(b"not a world file at all")
+    with pytest.raises(ValueError):
+        WorldFile(path)
+
+
+def test_rejects_long_names(tmp_path):
+    with pytest.raises(ValueError):
+        save_world(tmp_path / "long.world", [WorldObject(HOUSE, 0, 0, 1, 1, (0, 0, 0), "x" * 33)])
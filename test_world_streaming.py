@@ -0,0 +1,78 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from shinchan_engine import Environment
+from world_objects import HOUSE, TREE, WorldObject
+from world_streaming import CHUNK_SIZE, ObjectListSource
+
+
+def make_environment(objects=(), **kwargs):
+    pygame.font.init()
+    return Environment(source=ObjectListSource(objects), threaded=False, **kwargs)
+
+
+def test_evicts_least_recently_used_chunks():
+    env = make_environment(max_chunks=4)
+    try:
+        env.load_chunks([(10, 10), (11, 10), (12, 10), (13, 10), (14, 10), (15, 10)])
+        env.add_object(WorldObject(TREE, 10 * CHUNK_SIZE + 5, 10 * CHUNK_SIZE + 5, 40, 60,
+                                   (0, 100, 0), "Tree"))
+        # Touch (12, 10) so it is no longer the oldest
+        env.chunks.move_to_end((12, 10))
+        view = pygame.Rect(0, 0, 100, 100)
+        env.stream(view)
+        # Near the view stays pinned, and the edited chunk is never evicted;
+        # of the rest, the least recently used go first
+        assert (10, 10) in env.chunks
+        assert (12, 10) in env.chunks
+        assert (11, 10) not in env.chunks
+        assert (13, 10) not in env.chunks
+        assert list(env.chunks) == [(10, 10), (14, 10), (15, 10), (12, 10)]
+    finally:
+        env.close()
+
+
+def test_evicting_a_chunk_forgets_drawing_it_reaches():
+    # The house sits in chunk (0, 0) but draws into (1, 0) and (0, 1)
+    house = WorldObject(HOUSE, CHUNK_SIZE - 60, CHUNK_SIZE - 60, 150, 120, (139, 69, 19), "House")
+    env = make_environment([house])
+    try:
+        for chunk in ((0, 0), (1, 0), (0, 1), (1, 1), (3, 0)):
+            env.get_chunk_layer(chunk)
+            env.get_chunk_occluders(chunk)
+        assert [obj.name for obj in env.get_chunk_objects((1, 1))] == ["House"]
+        assert env.chunk_layers[(1, 0)] is not None
+
+        env.evict_chunk((0, 0))
+        for chunk in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            assert chunk not in env.chunk_objects
+            assert chunk not in env.chunk_layers
+            assert chunk not in env.chunk_occluders
+        # Beyond CHUNK_REACH nothing was dropped
+        assert (3, 0) in env.chunk_objects
+        assert not env.occluders
+
+        # Drawing again reloads the house
+        assert [obj.name for obj in env.get_chunk_objects((1, 0))] == ["House"]
+    finally:
+        env.close()
+
+
+def test_editing_an_object_redraws_its_chunks():
+    tree = WorldObject(TREE, 100, 100, 40, 60, (0, 100, 0), "Tree")
+    env = make_environment([tree])
+    try:
+        layer = env.get_chunk_layer((0, 0))
+        version = env.version
+        obj = env.get_chunk_objects((0, 0))[0]
+        env.update_object(obj, x=CHUNK_SIZE + 100)
+        assert env.version > version
+        assert (0, 0) not in env.chunk_layers
+        assert env.get_chunk_objects((0, 0)) == []
+        assert env.get_chunk_layer((0, 0)) is None
+        assert env.get_chunk_layer((1, 0)) is not layer
+    finally:
+        env.close()
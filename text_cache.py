@@ -0,0 +1,66 @@
+import time
+import pygame
+from collections import OrderedDict
+
+# Shared font and rendered-text cache.
+# Fonts are loaded once per (name, size); rendered surfaces are kept in an
+# LRU keyed by (font name, size, text, color, antialias).
+# The font module is initialized on the first font load. The default font
+# (name None) is loaded directly rather than through SysFont, which scans
+# every installed font first even when it ends up loading the default.
+class TextCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.font_loads = 0
+        self.font_seconds = 0.0
+
+    def get_font(self, size, name=None):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            start = time.perf_counter()
+            if not pygame.font.get_init():
+                pygame.font.init()
+            if name is None:
+                font = pygame.font.Font(None, size)
+            else:
+                font = pygame.font.SysFont(name, size)
+            self.fonts[key] = font
+            self.font_loads += 1
+            self.font_seconds += time.perf_counter() - start
+        return font
+
+    def render(self, text, size, color, antialias=True, name=None):
+        key = (name, size, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.get_font(size, name).render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.surfaces),
+            "fonts": len(self.fonts),
+            "font_loads": self.font_loads,
+        }
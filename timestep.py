@@ -0,0 +1,30 @@
+# Fixed-timestep accumulator. Real elapsed time is fed in once per rendered
+# frame; it answers how many simulation ticks to run and how far the renderer
+# is between the last two ticks (for interpolation).
+class FixedTimestep:
+    def __init__(self, tick_rate, max_steps=5):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps  # Cap per frame so a stall can't snowball
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.dropped_ticks = 0
+
+    def advance(self, elapsed):
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            self.dropped_ticks += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        self.ticks += steps
+        return steps
+
+    def alpha(self):
+        # Fraction of a tick since the last simulation step, in [0, 1)
+        return min(self.accumulator / self.dt, 1.0)
+
+    def reset(self):
+        self.accumulator = 0.0
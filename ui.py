@@ -0,0 +1,72 @@
+import pygame
+
+# Retained-mode UI. A widget keeps its rendered surface and only renders again
+# when its bound value changes, so drawing an unchanged menu or HUD is one
+# blit per widget. bind is either a constant or a function returning the
+# current value (the score, say); it is called every draw and compared with
+# the value last rendered.
+class Widget:
+    def __init__(self, pos=(0, 0), anchor="topleft", bind=None):
+        self.pos = pos
+        self.anchor = anchor  # Which point of the surface's rect sits at pos
+        self.bind = bind
+        self.surface = None
+        self.value = None
+        self.rect = None
+        self.renders = 0
+
+    def current(self):
+        return self.bind() if callable(self.bind) else self.bind
+
+    def render(self, value):
+        raise NotImplementedError
+
+    def draw(self, target):
+        value = self.current()
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.render(value)
+            self.rect = self.surface.get_rect(**{self.anchor: self.pos})
+            self.renders += 1
+        return target.blit(self.surface, self.rect)
+
+    def invalidate(self):
+        # Render again on the next draw, e.g. after the display mode changed
+        self.surface = None
+
+
+# A line of text; the bound value is put into text with str.format
+class Label(Widget):
+    def __init__(self, text_cache, bind, size, color, pos, anchor="topleft", text="{}"):
+        super().__init__(pos, anchor, bind)
+        self.text_cache = text_cache
+        self.size = size
+        self.color = color
+        self.text = text
+
+    def render(self, value):
+        return self.text_cache.render(self.text.format(value), self.size, self.color)
+
+
+# A surface painted by paint(surface, value), e.g. a whole static menu screen.
+# alpha makes the finished surface translucent.
+class Canvas(Widget):
+    def __init__(self, size, paint, bind=None, pos=(0, 0), anchor="topleft", alpha=None):
+        super().__init__(pos, anchor, bind)
+        self.size = size
+        self.paint = paint
+        self.alpha = alpha
+
+    def render(self, value):
+        surface = pygame.Surface(self.size)
+        self.paint(surface, value)
+        if self.alpha is not None:
+            surface.set_alpha(self.alpha)
+        elif pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+
+def draw_all(widgets, target):
+    # Draws widgets in order; returns the Rects they covered
+    return [widget.draw(target) for widget in widgets]
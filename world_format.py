@@ -0,0 +1,155 @@
+import argparse
+import mmap
+import struct
+import sys
+
+import numpy as np
+
+from world_objects import WorldObject
+from world_streaming import CHUNK_SIZE
+
+# Binary world file, little-endian:
+#   header      MAGIC, version, chunk size, chunk count, object count
+#   chunk index one CHUNK_DTYPE row per non-empty chunk, sorted by key
+#   objects     one OBJECT_DTYPE row per object, grouped by chunk in index order
+# Loading maps the file and views both tables in place, so nothing is parsed
+# until a chunk is asked for.
+MAGIC = b"SCWF"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+
+# type holds a world_objects tag
+NAME_BYTES = 32
+OBJECT_DTYPE = np.dtype([
+    ("type", "u1"),
+    ("color", "u1", (3,)),
+    ("x", "<i4"),
+    ("y", "<i4"),
+    ("width", "<i4"),
+    ("height", "<i4"),
+    ("name", f"S{NAME_BYTES}"),
+])
+CHUNK_DTYPE = np.dtype([("key", "<i8"), ("start", "<u4"), ("count", "<u4")])
+
+
+def chunk_key(cx, cy):
+    # Sortable single integer for a chunk, valid for |cx|, |cy| < 2**31
+    return (cy << 32) + cx
+
+
+def to_records(objects, chunk_size=CHUNK_SIZE):
+    # WorldObjects to (chunk index, object records) arrays
+    records = np.zeros(len(objects), dtype=OBJECT_DTYPE)
+    for i, obj in enumerate(objects):
+        name = obj.name.encode("utf-8")
+        if len(name) > NAME_BYTES:
+            raise ValueError(f"object name longer than {NAME_BYTES} bytes: {obj.name!r}")
+        records[i] = (obj.type, obj.color, obj.x, obj.y, obj.width, obj.height, name)
+
+    keys = chunk_key(records["x"].astype(np.int64) // chunk_size,
+                     records["y"].astype(np.int64) // chunk_size)
+    order = np.argsort(keys, kind="stable")
+    records = records[order]
+    unique, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    index = np.zeros(len(unique), dtype=CHUNK_DTYPE)
+    index["key"] = unique
+    index["start"] = starts
+    index["count"] = counts
+    return index, records
+
+
+def save_world(path, objects, chunk_size=CHUNK_SIZE):
+    index, records = to_records(objects, chunk_size)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, chunk_size, len(index), len(records)))
+        f.write(index.tobytes())
+        f.write(records.tobytes())
+    return len(records)
+
+
+# A world file mapped into memory. index and records are read-only NumPy views
+# of the mapping; close() releases it.
+class WorldFile:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.chunk_size, chunks, objects = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a world file")
+        if version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is world format version {version}, expected {VERSION}")
+        offset = HEADER.size
+        self.index = np.frombuffer(self.map, CHUNK_DTYPE, chunks, offset)
+        offset += chunks * CHUNK_DTYPE.itemsize
+        self.records = np.frombuffer(self.map, OBJECT_DTYPE, objects, offset)
+
+    def __len__(self):
+        return len(self.records)
+
+    def chunk_records(self, chunk):
+        key = chunk_key(chunk[0], chunk[1])
+        i = int(np.searchsorted(self.index["key"], key))
+        if i == len(self.index) or self.index["key"][i] != key:
+            return self.records[:0]
+        start = int(self.index["start"][i])
+        return self.records[start:start + int(self.index["count"][i])]
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.index = self.records = None
+        self.map.close()
+
+
+def to_objects(records):
+    # Columns go through tolist() once instead of converting field by field
+    colors = [tuple(color) for color in records["color"].tolist()]
+    names = [name.decode("utf-8") for name in records["name"].tolist()]
+    return [WorldObject(*fields) for fields in zip(records["type"].tolist(), records["x"].tolist(),
+                                                   records["y"].tolist(), records["width"].tolist(),
+                                                   records["height"].tolist(), colors, names)]
+
+
+# Chunk source (see world_streaming) reading a world file. Only the records of
+# the requested chunk are turned into WorldObjects.
+class BinaryChunkSource:
+    def __init__(self, path):
+        self.world = WorldFile(path)
+        if self.world.chunk_size != CHUNK_SIZE:
+            raise ValueError(f"{path} uses {self.world.chunk_size}px chunks, expected {CHUNK_SIZE}")
+
+    def load_chunk(self, chunk):
+        return to_objects(self.world.chunk_records(chunk))
+
+    def close(self):
+        self.world.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write the built-in Shin-chan world to a binary world file")
+    parser.add_argument("output", help="world file to write")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the generated trees")
+    parser.add_argument("--chunks", type=int, nargs=2, metavar=("WIDE", "HIGH"),
+                        help="only convert this many chunks from the top-left (default: the whole world)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    # The in-code world: Environment's default source, i.e. the landmarks from
+    # create_world plus the trees generated for the given seed
+    import shinchan_engine
+
+    args = parse_args(argv)
+    source = shinchan_engine.Environment(seed=args.seed, threaded=False).loader.source
+    wide, high = args.chunks or (shinchan_engine.WORLD_WIDTH // CHUNK_SIZE,
+                                 shinchan_engine.WORLD_HEIGHT // CHUNK_SIZE)
+    objects = [obj for cy in range(high) for cx in range(wide) for obj in source.load_chunk((cx, cy))]
+    count = save_world(args.output, objects)
+    print(f"Wrote {count} objects in {wide}x{high} chunks to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+# Object type tags. Tags are stored in world files, so new types go on the end.
+HOUSE, BUILDING, PARK, TREE, DISTRICT = range(5)
+TYPE_NAMES = ("house", "building", "park", "tree", "district")
+TYPE_TAGS = {name: tag for tag, name in enumerate(TYPE_NAMES)}
+
+
+# One prop in the world. Slots keep each object to a fixed handful of
+# attributes instead of a dict, which matters with hundreds of thousands loaded.
+class WorldObject:
+    __slots__ = ("type", "x", "y", "width", "height", "color", "name")
+
+    def __init__(self, type, x, y, width, height, color, name):
+        self.type = type  # One of the tags above
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.color = color
+        self.name = name
+
+    def __repr__(self):
+        return (f"WorldObject({TYPE_NAMES[self.type]}, {self.x}, {self.y}, "
+                f"{self.width}, {self.height}, {self.color}, {self.name!r})")
+
+    def copy(self):
+        return WorldObject(self.type, self.x, self.y, self.width, self.height, self.color, self.name)
+
+    def to_dict(self):
+        # Plain form for JSON, with the type by name
+        return {"type": TYPE_NAMES[self.type], "x": self.x, "y": self.y, "width": self.width,
+                "height": self.height, "color": list(self.color), "name": self.name}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(TYPE_TAGS[data["type"]], data["x"], data["y"], data["width"],
+                   data["height"], tuple(data["color"]), data["name"])
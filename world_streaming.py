@@ -0,0 +1,126 @@
+import json
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from world_objects import TREE, WorldObject
+
+# The world is stored and streamed in CHUNK_SIZE squares. An object belongs to
+# the chunk containing its (x, y) corner.
+CHUNK_SIZE = 512
+
+
+def chunk_of(x, y):
+    return (int(x // CHUNK_SIZE), int(y // CHUNK_SIZE))
+
+
+# Chunk sources return fresh WorldObjects for one chunk from load_chunk(chunk).
+# The loader calls them from its worker thread, so they must not share mutable
+# state with the game.
+
+class ObjectListSource:
+    # A fixed set of objects, e.g. hand-placed landmarks
+    def __init__(self, objects):
+        self.chunks = {}
+        for obj in objects:
+            self.chunks.setdefault(chunk_of(obj.x, obj.y), []).append(obj.copy())
+
+    def load_chunk(self, chunk):
+        return [obj.copy() for obj in self.chunks.get(chunk, ())]
+
+
+class GeneratedSource:
+    # Trees scattered from a seed on top of an optional base source. Each chunk
+    # gets its own RNG, so a chunk looks the same whenever and in whatever order
+    # it is loaded. bounds (left, top, right, bottom) limits where trees grow.
+    def __init__(self, seed, base=None, trees_per_chunk=4.0, bounds=None):
+        self.seed = seed
+        self.base = base
+        self.trees_per_chunk = trees_per_chunk
+        self.bounds = bounds
+
+    def load_chunk(self, chunk):
+        objects = self.base.load_chunk(chunk) if self.base is not None else []
+        rng = random.Random(f"{self.seed}:{chunk[0]}:{chunk[1]}")
+        count = int(self.trees_per_chunk)
+        if rng.random() < self.trees_per_chunk - count:
+            count += 1
+
+        left = chunk[0] * CHUNK_SIZE
+        top = chunk[1] * CHUNK_SIZE
+        for _ in range(count):
+            x = rng.randrange(left, left + CHUNK_SIZE)
+            y = rng.randrange(top, top + CHUNK_SIZE)
+            if self.bounds is not None and not (self.bounds[0] <= x <= self.bounds[2]
+                                                and self.bounds[1] <= y <= self.bounds[3]):
+                continue
+            objects.append(WorldObject(TREE, x, y, 40, 60, (0, 100, 0), "Tree"))
+        return objects
+
+
+class DirectorySource:
+    # One JSON file per chunk, as written by save_chunks. Chunks without a file
+    # come from the fallback source (or are empty).
+    def __init__(self, path, fallback=None):
+        self.path = path
+        self.fallback = fallback
+
+    def chunk_path(self, chunk):
+        return os.path.join(self.path, f"chunk_{chunk[0]}_{chunk[1]}.json")
+
+    def load_chunk(self, chunk):
+        try:
+            with open(self.chunk_path(chunk)) as f:
+                objects = json.load(f)
+        except FileNotFoundError:
+            return self.fallback.load_chunk(chunk) if self.fallback is not None else []
+        return [WorldObject.from_dict(obj) for obj in objects]
+
+
+def save_chunks(source, path, chunks):
+    # Write the given chunks of any source out for DirectorySource; empty chunks are skipped
+    os.makedirs(path, exist_ok=True)
+    target = DirectorySource(path)
+    written = 0
+    for chunk in chunks:
+        objects = source.load_chunk(chunk)
+        if objects:
+            with open(target.chunk_path(chunk), "w") as f:
+                json.dump([obj.to_dict() for obj in objects], f)
+            written += 1
+    return written
+
+
+# Loads chunks on a worker thread. request() queues a chunk, poll() hands
+# back the finished ones on the caller's thread, and load_now() gets one
+# immediately (waiting for it if it was already queued).
+class ChunkLoader:
+    def __init__(self, source, threaded=True):
+        self.source = source
+        self.executor = ThreadPoolExecutor(max_workers=1) if threaded else None
+        self.pending = {}  # chunk -> Future
+        self.loads = 0
+
+    def request(self, chunk):
+        if self.executor is not None and chunk not in self.pending:
+            self.pending[chunk] = self.executor.submit(self.source.load_chunk, chunk)
+
+    def poll(self):
+        done = [chunk for chunk, future in self.pending.items() if future.done()]
+        loaded = [(chunk, self.pending.pop(chunk).result()) for chunk in done]
+        self.loads += len(loaded)
+        return loaded
+
+    def load_now(self, chunk):
+        future = self.pending.pop(chunk, None)
+        self.loads += 1
+        if future is not None:
+            return future.result()
+        return self.source.load_chunk(chunk)
+
+    def shutdown(self, wait=False):
+        # wait=True also waits for a load already running, e.g. before the
+        # source is closed under it
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+        self.pending = {}